@@ -1,18 +1,33 @@
-import requests
+import asyncio
+import itertools
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 
-class SuiRpcClient:
-    def __init__(self, network: str = "mainnet", local_port: int = 9000, custom_endpoint: Optional[str] = None):
+import httpx
+
+import http_client
+
+# Calls per JSON-RPC batch; fullnodes reject larger arrays
+MAX_BATCH_SIZE = 50
+
+RpcCall = Tuple[str, list]
+
+
+class _SuiRpcBase:
+    def __init__(self, network: str = "mainnet", local_port: int = 9000, custom_endpoint: Optional[str] = None,
+                 max_batch_size: int = MAX_BATCH_SIZE):
         """
         Initialize Sui RPC client
         
         :param network: 'mainnet', 'testnet', 'devnet', or 'local'
         :param local_port: Port for local network (default: 9000)
         :param custom_endpoint: Override with custom fullnode URL
+        :param max_batch_size: Most calls sent in one batch request (default: 50)
         """
         self.endpoint = self._get_endpoint(network, local_port, custom_endpoint)
         self.headers = {"Content-Type": "application/json"}
+        self.max_batch_size = max_batch_size
+        self._ids = itertools.count(1)
     
     def _get_endpoint(self, network: str, local_port: int, custom_endpoint: Optional[str]) -> str:
         if custom_endpoint:
@@ -26,33 +41,125 @@ class SuiRpcClient:
         else:
             raise ValueError(f"Unsupported network: {network}")
 
-    def call_rpc(self, method: str, params: list, rpc_id: int = 1) -> Dict[str, Any]:
+    def _payload(self, method: str, params: list, rpc_id: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": next(self._ids) if rpc_id is None else rpc_id,
+            "method": method,
+            "params": params
+        }
+
+    def _chunks(self, calls: Sequence[RpcCall]) -> List[List[Dict[str, Any]]]:
+        payloads = [self._payload(method, params) for method, params in calls]
+        return [payloads[i:i + self.max_batch_size] for i in range(0, len(payloads), self.max_batch_size)]
+
+    @staticmethod
+    def _match(payloads: List[Dict[str, Any]], body: Any) -> List[Dict[str, Any]]:
+        # The fullnode may answer a batch in any order; put responses back in call order by id
+        if not isinstance(body, list):
+            error = body.get("error") if isinstance(body, dict) else body
+            raise Exception(f"RPC batch call failed: {error}")
+        by_id = {response.get("id"): response for response in body}
+        missing = [payload["method"] for payload in payloads if payload["id"] not in by_id]
+        if missing:
+            raise Exception(f"RPC batch call failed: no response for {', '.join(missing)}")
+        return [by_id[payload["id"]] for payload in payloads]
+
+
+class SuiRpcClient(_SuiRpcBase):
+    """Blocking client; keeps its connections to the fullnode alive between calls."""
+
+    def __init__(self, *args, pool_size: int = 10, **kwargs):
+        """
+        :param pool_size: Connections kept open to the fullnode (default: 10)
+        
+        The other arguments select the fullnode, as for ``AsyncSuiRpcClient``.
+        """
+        # requests is only needed here; the MCP servers use the async client and skip its import
+        import requests
+
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self) -> "SuiRpcClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _post(self, body: Any) -> Any:
+        import requests
+
+        try:
+            response = self.session.post(self.endpoint, json=body, timeout=10)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"RPC call failed: {e}")
+
+    def call_rpc(self, method: str, params: list, rpc_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Make JSON-RPC 2.0 call to Sui fullnode
         
         :param method: RPC method name (e.g. 'suix_getCoinMetadata')
         :param params: List of parameters
-        :param rpc_id: Request ID (default: 1)
+        :param rpc_id: Request ID (default: next id of this client)
         :return: Parsed JSON response
         """
-        payload = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "method": method,
-            "params": params
-        }
+        return self._post(self._payload(method, params, rpc_id))
+
+    def batch_call(self, calls: Sequence[RpcCall]) -> List[Dict[str, Any]]:
+        """
+        Make several JSON-RPC 2.0 calls in one request (one per ``max_batch_size`` calls)
         
+        :param calls: (method, params) pairs, e.g. [('suix_getCoinMetadata', [coin_type]), ...]
+        :return: Parsed JSON response of each call, in call order
+        """
+        results = []
+        for payloads in self._chunks(calls):
+            results.extend(self._match(payloads, self._post(payloads)))
+        return results
+
+
+class AsyncSuiRpcClient(_SuiRpcBase):
+    """Async client on the shared pooled ``http_client``, with its per-host limits and circuit breaker."""
+
+    async def _post(self, body: Any) -> Any:
         try:
-            response = requests.post(
-                self.endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=10
-            )
+            response = await http_client.post(self.endpoint, json=body, headers=self.headers)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"RPC call failed: {e}")
+        except httpx.HTTPError as e:
+            raise Exception(f"RPC call failed: {http_client.error_text(e)}")
+
+    async def call_rpc(self, method: str, params: list, rpc_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Make JSON-RPC 2.0 call to Sui fullnode
+        
+        :param method: RPC method name (e.g. 'suix_getCoinMetadata')
+        :param params: List of parameters
+        :param rpc_id: Request ID (default: next id of this client)
+        :return: Parsed JSON response
+        """
+        return await self._post(self._payload(method, params, rpc_id))
+
+    async def batch_call(self, calls: Sequence[RpcCall]) -> List[Dict[str, Any]]:
+        """
+        Make several JSON-RPC 2.0 calls in one request; batches beyond ``max_batch_size`` go out concurrently
+        
+        :param calls: (method, params) pairs, e.g. [('suix_getCoinMetadata', [coin_type]), ...]
+        :return: Parsed JSON response of each call, in call order
+        """
+        chunks = self._chunks(calls)
+        bodies = await asyncio.gather(*(self._post(payloads) for payloads in chunks))
+        return [response for payloads, body in zip(chunks, bodies) for response in self._match(payloads, body)]
 
 # Example Usage
 if __name__ == "__main__":
@@ -69,3 +176,11 @@ if __name__ == "__main__":
     
     print(json.dumps(usdc_metadata, indent=2))
 
+    # Metadata for several coins in one round trip
+    coin_types = [
+        "0x2::sui::SUI",
+        "0x168da5bf1f48dafc111b0a488fa454aca95e0b5e::usdc::USDC",
+    ]
+    for metadata in client.batch_call([("suix_getCoinMetadata", [coin_type]) for coin_type in coin_types]):
+        print(json.dumps(metadata, indent=2))
+
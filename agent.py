@@ -1,21 +1,102 @@
-from smolagents import ToolCallingAgent, ToolCollection, LiteLLMModel
-from mcp import StdioServerParameters, ClientSession
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from smolagents import ToolCallingAgent, LiteLLMModel
+from smolagents.memory import ToolCall
+from smolagents.utils import AgentParsingError
+from mcpadapt.smolagents_adapter import SmolAgentsAdapter
+from mcp import StdioServerParameters
+
+from session_pool import BlockingSessionPool, POOL_SIZE
+from tool_executor import ToolExecutor
 
 model = LiteLLMModel(
     model_id="ollama_chat/llama3.2",
     num_ctx=8192
 )
 
-server_parameters= StdioServerParameters(
+# MCP_SERVER_URL points at a running `server.py --transport sse`; otherwise spawn stdio children
+server_parameters= os.environ.get("MCP_SERVER_URL") or StdioServerParameters(
     command='uv',
     args=['run', 'server.py'],
     env=None,
 )
 
-with ToolCollection.from_mcp(server_parameters, trust_remote_code=True) as tool_collection:
-    agent = ToolCallingAgent(tools=[*tool_collection.tools], model=model)
-    #agent.run("How has ETH-USD price moved in staring from 1st march 2025 to 30th march 2025? ")
-    #agent.run("Could you swap 0.001 of 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 at a minimum price of 1601000 in the base chain with a slippage of 100 and the tokindecimal is 18")
-    agent.run("Could you swap 0.001 of 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 in the base chain with a slippage of 100 and the tokindecimal is 18")
-    #agent.run("Could you place a limit order of 0.001 of 0x4200000000000000000000000000000000000006 for 1.8 of 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 at the chain 8453 with a slippage of 100")
-    #agent.run("what is the swap rate for 0.01 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 in the base chain")
\ No newline at end of file
+questions = [
+    #"How has ETH-USD price moved in staring from 1st march 2025 to 30th march 2025? ",
+    #"Could you swap 0.001 of 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 at a minimum price of 1601000 in the base chain with a slippage of 100 and the tokindecimal is 18",
+    "Could you swap 0.001 of 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 in the base chain with a slippage of 100 and the tokindecimal is 18",
+    #"Could you place a limit order of 0.001 of 0x4200000000000000000000000000000000000006 for 1.8 of 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 at the chain 8453 with a slippage of 100",
+    #"what is the swap rate for 0.01 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE to 0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913 in the base chain",
+]
+
+def pooled_tools(pool):
+    # Same smolagents tools ToolCollection.from_mcp builds, but each call borrows a pooled session
+    adapter = SmolAgentsAdapter()
+    def caller(name):
+        return lambda arguments: pool.call_tool(name, arguments)
+    return [adapter.adapt(caller(tool.name), tool) for tool in pool.list_tools().tools]
+
+class ParallelToolCallingAgent(ToolCallingAgent):
+    """ToolCallingAgent that runs every tool call of a turn, side by side, instead of only the first."""
+
+    def __init__(self, *args, executor=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = executor or ToolExecutor()
+
+    def step(self, memory_step):
+        memory_messages = self.write_memory_to_messages()
+        self.input_messages = memory_messages
+        memory_step.model_input_messages = memory_messages.copy()
+        try:
+            model_message = self.model(
+                memory_messages,
+                tools_to_call_from=list(self.tools.values()),
+                stop_sequences=["Observation:", "Calling tools:"],
+            )
+            memory_step.model_output_message = model_message
+        except Exception as e:
+            raise AgentParsingError(f"Error while generating or parsing output:\n{e}", self.logger) from e
+
+        if not model_message.tool_calls:
+            raise AgentParsingError(
+                "Model did not call any tools. Call `final_answer` tool to return a final answer.", self.logger
+            )
+        calls = [
+            ToolCall(name=call.function.name, arguments=call.function.arguments or {}, id=call.id)
+            for call in model_message.tool_calls
+        ]
+        memory_step.tool_calls = calls
+
+        final = next((call for call in calls if call.name == "final_answer"), None)
+        if final is not None:
+            answer = final.arguments
+            if isinstance(answer, dict) and "answer" in answer:
+                answer = answer["answer"]
+            if isinstance(answer, str) and answer in self.state:
+                answer = self.state[answer]
+            memory_step.action_output = answer
+            return answer
+
+        observations = self.executor.map(
+            [lambda call=call: self.execute_tool_call(call.name, call.arguments) for call in calls]
+        )
+        if len(calls) == 1:
+            memory_step.observations = str(observations[0]).strip()
+        else:
+            # Results are merged in the order the model asked for them
+            memory_step.observations = "\n\n".join(
+                f"{call.name}({call.arguments}):\n{str(observation).strip()}"
+                for call, observation in zip(calls, observations)
+            )
+        self.logger.log(f"Observations: {memory_step.observations.replace('[', '|')}")
+        return None
+
+with BlockingSessionPool(server_parameters) as pool:
+    tools = pooled_tools(pool)
+    def run(question):
+        # Agents keep per-run memory, so each question gets its own
+        return ParallelToolCallingAgent(tools=tools, model=model).run(question)
+    with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+        for answer in executor.map(run, questions):
+            print(answer)
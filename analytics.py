@@ -0,0 +1,81 @@
+"""Vectorized summary statistics over cached price history."""
+from datetime import timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from price_cache import INTERVAL_LENGTHS
+
+
+def periods_per_year(interval: str) -> float:
+    """Number of bars per year for an interval, assuming 24/7 crypto trading."""
+    return timedelta(days=365) / INTERVAL_LENGTHS.get(interval, timedelta(days=1))
+
+
+def _round(value, digits: int = 6):
+    if value is None or pd.isna(value):
+        return None
+    return round(float(value), digits)
+
+
+def summarize_prices(closes: pd.DataFrame, interval: str = '1d', volatility_window: int = 30, ma_windows: List[int] = (7, 30)) -> Dict:
+    """Summarizes returns, volatility, drawdown, moving averages and correlation.
+
+    All statistics are computed column-wise over the whole table at once.
+
+    Args:
+        closes: Date-indexed close prices, one column per ticker
+        interval: Bar interval of ``closes``, used to annualize volatility
+        volatility_window: Number of bars in the rolling volatility window
+        ma_windows: Moving-average lengths in bars
+
+    Returns:
+        dict: {'tickers': {ticker: stats}, 'correlation': {ticker: {ticker: corr}}}
+    """
+    closes = closes.sort_index()
+    returns = closes.pct_change(fill_method=None)
+    annualizer = np.sqrt(periods_per_year(interval))
+
+    first = closes.bfill().iloc[0]
+    last = closes.ffill().iloc[-1]
+    total_return = last / first - 1
+    volatility = returns.std() * annualizer
+    rolling_volatility = returns.rolling(volatility_window, min_periods=2).std().ffill().iloc[-1] * annualizer
+
+    running_peak = closes.cummax()
+    drawdown = closes / running_peak - 1
+    max_drawdown = drawdown.min()
+    trough_dates = drawdown.idxmin()
+    moving_averages = {window: closes.rolling(window).mean().ffill().iloc[-1] for window in ma_windows}
+
+    summary = {}
+    for ticker in closes.columns:
+        trough_date = trough_dates[ticker]
+        peak_date = closes.loc[:trough_date, ticker].idxmax() if pd.notna(trough_date) else None
+        summary[ticker] = {
+            'start_price': _round(first[ticker]),
+            'end_price': _round(last[ticker]),
+            'high': _round(closes[ticker].max()),
+            'low': _round(closes[ticker].min()),
+            'total_return': _round(total_return[ticker]),
+            'annualized_volatility': _round(volatility[ticker]),
+            f'rolling_volatility_{volatility_window}': _round(rolling_volatility[ticker]),
+            'max_drawdown': _round(max_drawdown[ticker]),
+            'max_drawdown_peak': str(peak_date) if peak_date is not None else None,
+            'max_drawdown_trough': str(trough_date) if pd.notna(trough_date) else None,
+            'moving_averages': {f'ma_{window}': _round(values[ticker]) for window, values in moving_averages.items()},
+            'bars': int(closes[ticker].count()),
+        }
+
+    correlation = returns.corr() if len(closes.columns) > 1 else None
+    return {
+        'interval': interval,
+        'start': str(closes.index[0]) if len(closes) else None,
+        'end': str(closes.index[-1]) if len(closes) else None,
+        'tickers': summary,
+        'correlation': {
+            ticker: {other: _round(value, 4) for other, value in row.items()}
+            for ticker, row in correlation.to_dict(orient='index').items()
+        } if correlation is not None else None,
+    }
@@ -0,0 +1 @@
+"""Offline benchmarks for the MCP tools; see ``bench/run.py``."""
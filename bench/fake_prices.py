@@ -0,0 +1,47 @@
+"""Offline stand-in for the yfinance downloads behind the price tools.
+
+Generates a deterministic random walk per ticker, in the same frame layout
+as ``price_download.download_ohlcv``, after a configurable delay per call.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from price_cache import INTERVAL_LENGTHS, OHLCV_COLUMNS, empty_frame
+
+
+def fake_ohlcv(ticker: str, start: datetime, end: datetime, interval: str, latency: float = 0.0) -> pd.DataFrame:
+    """Returns OHLCV bars for ``ticker`` in [start, end); the same bar always has the same prices."""
+    if latency:
+        time.sleep(latency)
+    step = INTERVAL_LENGTHS.get(interval, INTERVAL_LENGTHS['1d'])
+    dates = pd.date_range(start, end, freq=step, inclusive='left')
+    if len(dates) == 0:
+        return empty_frame()
+
+    # Seed by ticker and bar number so overlapping ranges agree with each other
+    seed = int.from_bytes(hashlib.sha256(ticker.encode()).digest()[:4], "big")
+    bar = ((dates - pd.Timestamp("2000-01-01")) // step).to_numpy()
+    noise = np.sin(bar * 0.37 + seed % 1000) * 0.02 + np.sin(bar * 0.011 + seed % 97) * 0.2
+    close = 100.0 * (1 + seed % 50) * np.exp(noise)
+    frame = pd.DataFrame({
+        'Date': dates,
+        'Open': close * 0.998,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': (1e6 + (bar % 7) * 1e5).astype(float),
+    })
+    return frame[['Date'] + OHLCV_COLUMNS]
+
+
+def fake_ohlcv_many(tickers: List[str], start: datetime, end: datetime, interval: str,
+                    latency: float = 0.0) -> Dict[str, pd.DataFrame]:
+    """Multi-ticker variant with one delay for the whole batch, like a grouped download."""
+    if latency:
+        time.sleep(latency)
+    return {ticker: fake_ohlcv(ticker, start, end, interval) for ticker in tickers}
@@ -0,0 +1,179 @@
+"""Local stand-in for the KyberSwap aggregator and limit-order APIs.
+
+Serves the endpoints the tools call with deterministic, plausible payloads,
+after a configurable latency and with a configurable share of 5xx errors.
+Point the servers at it with KYBER_AGGREGATOR_URL and KYBER_LIMIT_ORDER_URL:
+
+    python -m bench.kyber_stub --port 8900 --latency-ms 80 --error-rate 0.01
+    KYBER_AGGREGATOR_URL=http://127.0.0.1:8900 KYBER_LIMIT_ORDER_URL=http://127.0.0.1:8900 uv run server.py
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+ROUTER_ADDRESS = "0x6131B5fae19EA4f9D964eAc0408E4408b66337b5"
+
+# Rough USD gas cost of a swap per chain, so multi-chain ranking has something to rank
+GAS_USD = {
+    "ethereum": 4.5,
+    "arbitrum": 0.08,
+    "optimism": 0.05,
+    "base": 0.02,
+    "polygon": 0.01,
+    "bsc": 0.06,
+    "avalanche": 0.1,
+}
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    # Input amount (smallest units) at which the quoted rate has halved
+    depth: float = 1e22
+    seed: Optional[int] = None
+
+
+def pair_rate(token_in: str, token_out: str) -> float:
+    """Deterministic output per input unit for a pair, between 0.5 and 2."""
+    digest = hashlib.sha256(f"{token_in.lower()}:{token_out.lower()}".encode()).digest()
+    return 0.5 + 1.5 * int.from_bytes(digest[:4], "big") / 2 ** 32
+
+
+def create_app(config: StubConfig = StubConfig()) -> Starlette:
+    """Returns the stub ASGI app; ``app.state.requests`` counts requests per endpoint."""
+    rng = random.Random(config.seed)
+    requests: Counter = Counter()
+
+    async def respond(endpoint: str, payload: dict) -> JSONResponse:
+        requests[endpoint] += 1
+        delay = max(0.0, rng.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            return JSONResponse({"code": 4000, "message": "stub upstream error"}, status_code=503)
+        return JSONResponse(payload)
+
+    def quote(chain: str, token_in: str, token_out: str, amount_in: int) -> dict:
+        # Output shrinks with size like a constant-product pool, so price impact curves have a shape
+        amount_out = int(amount_in * pair_rate(token_in, token_out) / (1 + amount_in / config.depth))
+        return {
+            "tokenIn": token_in,
+            "amountIn": str(amount_in),
+            "amountInUsd": f"{amount_in / 1e18 * 2000:.6f}",
+            "tokenOut": token_out,
+            "amountOut": str(amount_out),
+            "amountOutUsd": f"{amount_out / 1e18 * 2000:.6f}",
+            "gas": "180000",
+            "gasPrice": "1000000",
+            "gasUsd": f"{GAS_USD.get(chain, 0.5):.4f}",
+            "route": [],
+            "routeID": hashlib.sha1(f"{chain}:{token_in}:{token_out}:{amount_in}".encode()).hexdigest(),
+            "checksum": "0",
+            "timestamp": int(time.time()),
+        }
+
+    async def routes(request: Request) -> JSONResponse:
+        chain = request.path_params["chain"]
+        params = request.query_params
+        summary = quote(chain, params.get("tokenIn", ""), params.get("tokenOut", ""), int(params.get("amountIn", 0)))
+        return await respond("routes", {
+            "code": 0,
+            "message": "successfully",
+            "data": {"routeSummary": summary, "routerAddress": ROUTER_ADDRESS},
+        })
+
+    async def route_build(request: Request) -> JSONResponse:
+        body = await request.json()
+        summary = body.get("routeSummary", {})
+        return await respond("route/build", {
+            "code": 0,
+            "message": "successfully",
+            "data": {
+                "amountIn": summary.get("amountIn"),
+                "amountOut": summary.get("amountOut"),
+                "gas": summary.get("gas"),
+                "gasUsd": summary.get("gasUsd"),
+                "routerAddress": ROUTER_ADDRESS,
+                "data": "0x" + hashlib.sha256(repr(body).encode()).hexdigest() * 4,
+            },
+        })
+
+    async def sign_message(request: Request) -> JSONResponse:
+        order = await request.json()
+        return await respond("orders/sign-message", {
+            "code": 0,
+            "message": "Successfully",
+            "data": {
+                "domain": {"name": "Kyberswap Limit Order", "version": "2", "chainId": order.get("chainId"),
+                           "verifyingContract": ROUTER_ADDRESS},
+                "types": {"Order": [{"name": "salt", "type": "uint256"}]},
+                "message": {
+                    "maker": order.get("maker"),
+                    "makerAsset": order.get("makerAsset"),
+                    "takerAsset": order.get("takerAsset"),
+                    "makingAmount": order.get("makingAmount"),
+                    "takingAmount": order.get("takingAmount"),
+                    "expiredAt": order.get("expiredAt"),
+                },
+                "primaryType": "Order",
+            },
+        })
+
+    async def create_order(request: Request) -> JSONResponse:
+        await request.body()
+        return await respond("orders", {"code": 0, "message": "Successfully", "data": {"id": rng.randrange(10 ** 6)}})
+
+    async def list_orders(request: Request) -> JSONResponse:
+        return await respond("orders/list", {"code": 0, "message": "Successfully", "data": {"orders": [], "pagination": {"totalItems": 0}}})
+
+    async def cancel_sign(request: Request) -> JSONResponse:
+        body = await request.json()
+        return await respond("orders/cancel-sign", {"code": 0, "message": "Successfully", "data": {"message": body}})
+
+    async def cancel(request: Request) -> JSONResponse:
+        await request.body()
+        return await respond("orders/cancel", {"code": 0, "message": "Successfully", "data": {"cancelled": True}})
+
+    app = Starlette(routes=[
+        Route("/{chain}/api/v1/routes", routes, methods=["GET"]),
+        Route("/{chain}/api/v1/route/build", route_build, methods=["POST"]),
+        Route("/write/api/v1/orders/sign-message", sign_message, methods=["POST"]),
+        Route("/write/api/v1/orders", create_order, methods=["POST"]),
+        Route("/read-ks/api/v1/orders", list_orders, methods=["GET"]),
+        Route("/write/api/v1/orders/cancel-sign", cancel_sign, methods=["POST"]),
+        Route("/write/api/v1/orders/cancel", cancel, methods=["POST"]),
+    ])
+    app.state.requests = requests
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local KyberSwap API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=StubConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=StubConfig.error_rate,
+                        help="Share of requests answered with a 503 (0-1)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Offline latency and throughput benchmark for the MCP tools.
+
+Starts the KyberSwap stand-in on a free local port, swaps the yfinance
+downloads for the fake price source, then drives every scenario through
+``FastMCP.call_tool`` (argument validation and result conversion included)
+at a fixed concurrency. Caches, the token registry and the job store live
+in a temporary directory, so runs never touch the network or local state.
+
+    python -m bench.run --output bench-$(git rev-parse --short HEAD).json
+    python -m bench.run --only get_current_swap_rate --calls 500 --compare bench-abc1234.json
+
+Results are JSON keyed by scenario (p50/p90/p99/mean latency in ms,
+throughput in calls/s, errors, upstream requests) plus the commit they were
+measured at; ``--compare`` prints the change against an earlier run.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_USDC = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+ARBITRUM_USDC = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+ETHEREUM_USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+NATIVE = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+# Tokens registered up front so no scenario needs an RPC lookup for decimals
+KNOWN_TOKENS = {
+    "base": {BASE_USDC: {"decimals": 6, "symbol": "USDC"}},
+    "arbitrum": {ARBITRUM_USDC: {"decimals": 6, "symbol": "USDC"}},
+    "ethereum": {ETHEREUM_USDC: {"decimals": 6, "symbol": "USDC"}},
+}
+
+
+@dataclass
+class Scenario:
+    name: str
+    tool: str
+    arguments: Callable[[int], Dict[str, Any]]
+    description: str
+    # Called after the scenario so its leftovers don't load the next one
+    teardown: Optional[Callable[[], None]] = None
+
+
+def cancel_conditional_swaps():
+    import swap_jobs
+
+    for job in swap_jobs.store.active():
+        swap_jobs.cancel(job['id'])
+
+
+def scenarios() -> List[Scenario]:
+    # Amounts differ between scenarios so one scenario never hits quotes cached by another
+    swap = {"tokenInaddress": NATIVE, "tokenOutaddress": BASE_USDC, "targetChain": "base"}
+    return [
+        Scenario("get_current_swap_rate", "get_current_swap_rate",
+                 lambda i: {**swap, "swapamount": f"0.{i + 1:06d}"},
+                 "Distinct amounts; every call is a quote cache miss"),
+        Scenario("get_current_swap_rate_cached", "get_current_swap_rate",
+                 lambda i: {**swap, "swapamount": "0.01"},
+                 "Identical calls served by the quote cache and single-flight"),
+        Scenario("get_best_swap_rate", "get_best_swap_rate",
+                 lambda i: {
+                     "tokenInaddress": NATIVE,
+                     "tokenOutaddress": {"base": BASE_USDC, "arbitrum": ARBITRUM_USDC, "ethereum": ETHEREUM_USDC},
+                     "swapamount": f"1.{i + 1:06d}",
+                     "targetChains": "base,arbitrum,ethereum",
+                 },
+                 "Three chains quoted concurrently"),
+        Scenario("get_price_impact_curve", "get_price_impact_curve",
+                 lambda i: {**swap, "minAmount": f"2.{i + 1:06d}", "maxAmount": "100", "steps": 8},
+                 "Eight-size ladder"),
+        Scenario("perform_token_swap", "perform_token_swap",
+                 lambda i: {**swap, "swapamount": f"3.{i + 1:06d}", "slippage": 50},
+                 "Quote plus route build"),
+        Scenario("perform_condition_Token_swap", "perform_condition_Token_swap",
+                 lambda i: {**swap, "minPrice": 10 ** 30, "swapamount": "0.01", "tokenInDemical": 18,
+                            "slippage": 50, "expirySeconds": 600},
+                 "Job submission; watching happens in the background",
+                 teardown=cancel_conditional_swaps),
+        Scenario("place_limit_order", "place_limit_order",
+                 lambda i: {"tokenInaddress": NATIVE, "tokenOutaddress": BASE_USDC, "AmountIn": "0.01",
+                            "AmountOut": str(40 + i), "ChainID": 8453},
+                 "Sign-message request"),
+        Scenario("get_price_data_cold", "get_price_data",
+                 lambda i: {"ticker": f"COLD{i}-USD", "start_date": "2023-01-01", "end_date": "2024-01-01"},
+                 "New ticker every call; download, cache write and response"),
+        Scenario("get_price_data_warm", "get_price_data",
+                 lambda i: {"ticker": "WARM-USD", "start_date": "2023-01-01", "end_date": "2024-01-01",
+                            "max_points": 100},
+                 "Disk cache hit plus LTTB downsampling"),
+        Scenario("get_batch_price_data", "get_batch_price_data",
+                 lambda i: {"tickers": "ETH-USD,BTC-USD,SOL-USD", "start_date": "2023-01-01",
+                            "end_date": "2024-01-01", "max_points": 100},
+                 "Three tickers from the cache in one table"),
+        Scenario("get_price_analytics", "get_price_analytics",
+                 lambda i: {"tickers": ["ETH-USD", "BTC-USD"], "start_date": "2023-01-01", "end_date": "2024-01-01"},
+                 "Summary statistics over two cached tickers"),
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(port: int, config) -> Any:
+    """Runs the KyberSwap stand-in in a background thread; returns its app."""
+    import uvicorn
+
+    from bench.kyber_stub import create_app
+
+    app = create_app(config)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("KyberSwap stand-in did not start")
+        time.sleep(0.01)
+    return app
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+async def run_scenario(mcp, scenario: Scenario, calls: int, concurrency: int, upstream) -> Dict[str, Any]:
+    limit = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    upstream_before = sum(upstream.values())
+
+    async def call(i: int):
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            try:
+                result = await mcp.call_tool(scenario.tool, scenario.arguments(i))
+            except Exception:
+                errors += 1
+            else:
+                # Tools report some failures as None or an error payload instead of raising
+                if not result or any('"error"' in getattr(content, "text", "") for content in result):
+                    errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    samples = np.array(latencies)
+    return {
+        "tool": scenario.tool,
+        "description": scenario.description,
+        "calls": calls,
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p90_ms": round(float(np.percentile(samples, 90)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "max_ms": round(float(samples.max()), 3),
+        "throughput_per_s": round(calls / elapsed, 2),
+        "upstream_requests": sum(upstream.values()) - upstream_before,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Prints the latency and throughput change of every scenario against ``baseline``."""
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    print(f"{'scenario':34} {'p50 ms':>20} {'p99 ms':>20} {'calls/s':>20}")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:34} {'(new)':>20}")
+            continue
+        cells = []
+        for field in ("p50_ms", "p99_ms", "throughput_per_s"):
+            change = (result[field] - before[field]) / before[field] * 100 if before[field] else 0.0
+            cells.append(f"{result[field]:>10.1f} ({change:+6.1f}%)")
+        print(f"{name:34} {cells[0]:>20} {cells[1]:>20} {cells[2]:>20}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the MCP tools against local stand-ins")
+    parser.add_argument("--server", default="server", help="Server module to benchmark (default: server)")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per scenario (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight per scenario (default: 16)")
+    parser.add_argument("--only", action="append", help="Run only these scenarios (repeatable)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stand-in upstream latency (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Stand-in latency jitter (default: 10)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream 503s (default: 0)")
+    parser.add_argument("--price-latency-ms", type=float, default=200.0,
+                        help="Delay of each fake price download (default: 200)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mcp-bench-")
+    port = free_port()
+    # Must be set before the servers import http_client and the stores
+    os.environ["KYBER_AGGREGATOR_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["KYBER_LIMIT_ORDER_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["PRICE_CACHE_DIR"] = os.path.join(workdir, "price_cache")
+    os.environ["TOKEN_REGISTRY_PATH"] = os.path.join(workdir, "token_registry.json")
+    os.environ["JOB_STORE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    sys.path.insert(0, REPO_ROOT)
+
+    import importlib
+    from functools import partial
+
+    from bench.fake_prices import fake_ohlcv, fake_ohlcv_many
+    from bench.kyber_stub import StubConfig
+    from token_registry import registry
+
+    stub = start_stub(port, StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed))
+    for chain, tokens in KNOWN_TOKENS.items():
+        registry.register_many(chain, tokens)
+
+    server = importlib.import_module(args.server)
+    # The price tools import their download functions from price_download when called
+    import price_download
+
+    price_latency = args.price_latency_ms / 1000
+    price_download.download_ohlcv = partial(fake_ohlcv, latency=price_latency)
+    price_download.download_ohlcv_many = partial(fake_ohlcv_many, latency=price_latency)
+
+    async def run() -> Dict[str, Any]:
+        available = {tool.name for tool in await server.mcp.list_tools()}
+        results = {}
+        # Tools print progress; keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            async with server.mcp.settings.lifespan(server.mcp):
+                for scenario in scenarios():
+                    if args.only and scenario.name not in args.only or scenario.tool not in available:
+                        continue
+                    results[scenario.name] = await run_scenario(
+                        server.mcp, scenario, args.calls, args.concurrency, stub.state.requests
+                    )
+                    if scenario.teardown is not None:
+                        scenario.teardown()
+                    print(f"{scenario.name}: p50 {results[scenario.name]['p50_ms']} ms, "
+                          f"p99 {results[scenario.name]['p99_ms']} ms, "
+                          f"{results[scenario.name]['throughput_per_s']} calls/s", file=sys.stderr)
+        return results
+
+    report = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "server": args.server,
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": asyncio.run(run()),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
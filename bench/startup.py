@@ -0,0 +1,76 @@
+"""Startup-time budget for the MCP servers.
+
+Spawns the server over stdio the way ``main.py`` and ``agent.py`` do and
+measures the time from process start until the first ``list_tools``
+response, over several runs. Exits with status 1 when the median goes over
+the budget, so it can guard against heavy imports creeping back in:
+
+    python -m bench.startup --budget-ms 1500
+    python -m bench.startup --server swap_server.py --runs 10 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from bench.run import REPO_ROOT, git_revision
+
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 1500))
+
+
+async def time_to_list_tools(server: str) -> Dict[str, float]:
+    """Starts ``server`` once; returns milliseconds until initialize and list_tools answered."""
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(REPO_ROOT, server)], cwd=REPO_ROOT)
+    started = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            initialized = time.perf_counter()
+            await session.list_tools()
+            listed = time.perf_counter()
+    return {
+        "initialize_ms": round((initialized - started) * 1000, 1),
+        "list_tools_ms": round((listed - started) * 1000, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure server time-to-first-list_tools against a budget")
+    parser.add_argument("--server", default="server.py", help="Server script to start (default: server.py)")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Maximum median time to list_tools (default: {DEFAULT_BUDGET_MS:g}, or STARTUP_BUDGET_MS)")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    runs = [asyncio.run(time_to_list_tools(args.server)) for _ in range(args.runs)]
+    median = statistics.median(run["list_tools_ms"] for run in runs)
+    report: Dict[str, Any] = {
+        **git_revision(),
+        "server": args.server,
+        "runs": runs,
+        "median_list_tools_ms": median,
+        "max_list_tools_ms": max(run["list_tools_ms"] for run in runs),
+        "budget_ms": args.budget_ms,
+        "within_budget": median <= args.budget_ms,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if not report["within_budget"]:
+        print(f"{args.server}: median time to list_tools {median:.0f} ms is over the {args.budget_ms:g} ms budget",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
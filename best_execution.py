@@ -0,0 +1,108 @@
+"""Best-execution quotes for one swap across several chains and token addresses.
+
+Every (chain, tokenIn, tokenOut) combination is quoted concurrently through
+the shared KyberSwap route cache, so the whole comparison costs one round of
+wall-clock latency. Quotes are ranked by their USD output net of the route's
+gas cost, the one unit that is comparable across chains.
+"""
+import asyncio
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+import http_client
+import kyber_api
+from token_registry import normalize_chain, registry
+
+# A token given as one address for every chain, or per chain as one or more equivalent addresses
+TokenSpec = Union[str, Dict[str, Union[str, List[str]]]]
+
+
+def token_candidates(token: TokenSpec, chain: str) -> List[str]:
+    """Returns the addresses to quote for ``token`` on ``chain`` (empty if none is listed)."""
+    if isinstance(token, str):
+        return [token]
+    addresses = {normalize_chain(key): value for key, value in token.items()}.get(chain, [])
+    return [addresses] if isinstance(addresses, str) else list(addresses)
+
+
+def _usd(summary: Dict[str, Any], field: str) -> Optional[float]:
+    value = summary.get(field)
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+async def _quote(chain: str, tokenIn: str, tokenOut: str, amount: Decimal) -> Dict[str, Any]:
+    decimals_in, decimals_out = await asyncio.gather(
+        registry.aget_decimals(chain, tokenIn), registry.aget_decimals(chain, tokenOut)
+    )
+    amount_in = int(amount * (10 ** decimals_in))
+    data, quote_age = await kyber_api.get_route(chain, tokenIn, tokenOut, amount_in)
+    summary = data['data']['routeSummary']
+
+    output_amount = int(summary['amountOut']) / (10 ** decimals_out)
+    amount_out_usd = _usd(summary, 'amountOutUsd')
+    gas_usd = _usd(summary, 'gasUsd')
+    net_usd = amount_out_usd - gas_usd if amount_out_usd is not None and gas_usd is not None else None
+    # Gas expressed in tokenOut at the quote's own USD price
+    net_output = None
+    if net_usd is not None and amount_out_usd:
+        net_output = output_amount * net_usd / amount_out_usd
+
+    return {
+        "chain": chain,
+        "tokenIn": tokenIn,
+        "tokenOut": tokenOut,
+        "amountIn": str(amount_in),
+        "amountOut": summary['amountOut'],
+        "outputAmount": output_amount,
+        "amountOutUsd": amount_out_usd,
+        "gasUsd": gas_usd,
+        "netOutputUsd": net_usd,
+        "netOutputAmount": net_output,
+        "quoteAgeSeconds": round(quote_age, 3),
+    }
+
+
+async def best_execution(tokenIn: TokenSpec, tokenOut: TokenSpec, amount: Union[str, float, Decimal],
+                         chains: List[Union[str, int]]) -> Dict[str, Any]:
+    """Quotes a swap on every chain and token address combination at once.
+
+    Args:
+        tokenIn: Input token address, or {chain: address or [addresses]}
+        tokenOut: Output token address, or {chain: address or [addresses]}
+        amount: Amount of the input token in human-readable units
+        chains: Chain names or ids to quote on
+
+    Returns:
+        dict:
+            - best: The highest ranked quote, or None if every quote failed
+            - quotes: Successful quotes, best first by netOutputUsd (then outputAmount)
+            - errors: One entry per combination that could not be quoted
+    """
+    amount = Decimal(str(amount))
+    legs: List[Tuple[str, str, str]] = []
+    for chain in dict.fromkeys(normalize_chain(chain) for chain in chains):
+        for address_in in token_candidates(tokenIn, chain):
+            for address_out in token_candidates(tokenOut, chain):
+                legs.append((chain, address_in, address_out))
+
+    results = await asyncio.gather(*(_quote(*leg, amount) for leg in legs), return_exceptions=True)
+
+    quotes, errors = [], []
+    for (chain, address_in, address_out), result in zip(legs, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, (httpx.HTTPError, KeyError, TypeError, ValueError)):
+                raise result
+            message = http_client.error_text(result) if isinstance(result, httpx.HTTPError) else str(result)
+            errors.append({"chain": chain, "tokenIn": address_in, "tokenOut": address_out, "error": message})
+        else:
+            quotes.append(result)
+
+    # Quotes without USD pricing rank after every quote that has it
+    quotes.sort(key=lambda quote: (quote["netOutputUsd"] is not None, quote["netOutputUsd"] or 0.0,
+                                   quote["outputAmount"]), reverse=True)
+    return {"best": quotes[0] if quotes else None, "quotes": quotes, "errors": errors}
@@ -0,0 +1,23 @@
+"""Bounded thread pool for the blocking parts of async tools.
+
+yfinance downloads, pandas work and web3 calls would stall the event loop
+and every other in-flight request if they ran on it; async tools hand them
+to this pool instead. It is separate from ``price_download.executor`` so a
+tool waiting on its window downloads can never starve them of threads.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+TOOL_WORKERS = int(os.environ.get("TOOL_WORKERS", 8))
+
+executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs ``fn(*args, **kwargs)`` in the tool pool and awaits its result."""
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args, **kwargs))
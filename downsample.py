@@ -0,0 +1,109 @@
+"""Shape-preserving downsampling for price series returned to agents."""
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_METHODS = ('lttb', 'ohlc')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Picks ``n_out`` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves peaks and troughs.
+
+    Args:
+        x: Monotonically increasing x values (e.g., timestamps as floats)
+        y: Values to preserve the shape of
+        n_out: Number of points to keep
+
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the points between the first and the last one;
+    # the bucket after the final one is just the last point
+    edges = np.append(np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64), n)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2]
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # Twice the triangle area, for every candidate in the bucket at once
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def lttb(frame: pd.DataFrame, max_points: int, column: str = 'Close') -> pd.DataFrame:
+    """Downsamples a Date-indexed frame to at most ``max_points`` rows using LTTB on ``column``."""
+    if len(frame) <= max_points:
+        return frame
+    frame = frame.dropna(subset=[column]).reset_index(drop=True)
+    x = frame['Date'].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    y = frame[column].to_numpy(dtype=np.float64)
+    return frame.iloc[lttb_indices(x, y, max_points)].reset_index(drop=True)
+
+
+def ohlc_buckets(frame: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Aggregates consecutive rows into at most ``max_points`` OHLCV bars.
+
+    Each bar is stamped with the Date of its first row. Frames with only a
+    Close column are bucketed from their closes.
+    """
+    if len(frame) <= max_points:
+        return frame
+
+    # Equal-count contiguous buckets
+    buckets = np.arange(len(frame)) * max_points // len(frame)
+    close = frame['Close']
+    aggregated = pd.DataFrame({
+        'Date': frame['Date'].groupby(buckets).first(),
+        'Open': (frame['Open'] if 'Open' in frame else close).groupby(buckets).first(),
+        'High': (frame['High'] if 'High' in frame else close).groupby(buckets).max(),
+        'Low': (frame['Low'] if 'Low' in frame else close).groupby(buckets).min(),
+        'Close': close.groupby(buckets).last(),
+    })
+    if 'Volume' in frame:
+        aggregated['Volume'] = frame['Volume'].groupby(buckets).sum()
+    return aggregated.reset_index(drop=True)
+
+
+def wide_buckets(frame: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Buckets a wide Date + one-column-per-ticker frame into at most ``max_points`` rows.
+
+    Rows stay aligned across tickers: every bucket keeps the Date of its first
+    row and the last value of each ticker column.
+    """
+    max_points = int(max_points)
+    if max_points < 1:
+        raise ValueError("max_points must be at least 1")
+    if len(frame) <= max_points:
+        return frame
+
+    buckets = np.arange(len(frame)) * max_points // len(frame)
+    grouped = frame.groupby(buckets)
+    aggregated = grouped.last()
+    aggregated['Date'] = grouped['Date'].first()
+    return aggregated.reset_index(drop=True)
+
+
+def downsample(frame: pd.DataFrame, max_points: int, method: str = 'lttb') -> pd.DataFrame:
+    """Bounds a price frame to ``max_points`` rows with the given method ('lttb' or 'ohlc')."""
+    max_points = int(max_points)
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    if method == 'lttb':
+        return lttb(frame, max_points)
+    if method == 'ohlc':
+        return ohlc_buckets(frame, max_points)
+    raise ValueError(f"Unsupported downsample method: {method}. Options: {', '.join(DOWNSAMPLE_METHODS)}")
@@ -1,3 +1,7 @@
+from typing import Any, Dict, Iterable, Optional
+from weakref import WeakKeyDictionary
+
+from eth_abi import decode
 from web3 import Web3
 from web3.contract import Contract
 from web3.exceptions import BadFunctionCallOutput
@@ -11,9 +15,62 @@ ERC20_ABI = [
         "payable": False,
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "symbol",
+        "outputs": [{"name": "", "type": "string"}],
+        "payable": False,
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+NATIVE_TOKEN_ADDRESS = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+# Multicall3 is deployed at the same address on every major EVM chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
     }
 ]
 
+# 4-byte selectors of the ERC20 metadata getters
+METADATA_SELECTORS = {
+    "decimals": bytes.fromhex("313ce567"),
+    "symbol": bytes.fromhex("95d89b41"),
+    "name": bytes.fromhex("06fdde03"),
+}
+
+# provider -> {lowercase Multicall3 address: deployed}; a provider serves one chain
+_multicall_deployed: "WeakKeyDictionary[Any, Dict[str, bool]]" = WeakKeyDictionary()
+
 def getDecimals(tokenAddress: str, web3: Web3) -> int:
     """
     Get the decimals of an ERC20 token
@@ -33,7 +90,7 @@ def getDecimals(tokenAddress: str, web3: Web3) -> int:
         if not web3.is_address(tokenAddress):
             raise ValueError(f"Invalid token address: {tokenAddress}")
             
-        if tokenAddress.lower() == "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee":
+        if tokenAddress.lower() == NATIVE_TOKEN_ADDRESS:
             return 18
             
         # Create contract instance
@@ -50,6 +107,142 @@ def getDecimals(tokenAddress: str, web3: Web3) -> int:
         raise ValueError("Contract doesn't support decimals function")
     except Exception as e:
         raise ValueError(f"Error getting decimals: {str(e)}")
+
+
+def getSymbol(tokenAddress: str, web3: Web3) -> str:
+    """
+    Get the symbol of an ERC20 token
+    
+    Args:
+        tokenAddress: The contract address of the token
+        web3: Web3 instance connected to a provider
+        
+    Returns:
+        str: Token symbol (e.g., "USDC")
+        
+    Raises:
+        ValueError: If the address is invalid or contract doesn't support symbol
+    """
+    try:
+        if not web3.is_address(tokenAddress):
+            raise ValueError(f"Invalid token address: {tokenAddress}")
+
+        contract: Contract = web3.eth.contract(
+            address=web3.to_checksum_address(tokenAddress),
+            abi=ERC20_ABI
+        )
+        symbol: str = contract.functions.symbol().call()
+        return symbol
+
+    except BadFunctionCallOutput:
+        raise ValueError("Contract doesn't support symbol function")
+    except Exception as e:
+        raise ValueError(f"Error getting symbol: {str(e)}")
+
+
+def _decode_metadata(field: str, data: bytes):
+    """Decodes a metadata getter's return data, or returns None if it is not decodable."""
+    if not data:
+        return None
+    try:
+        if field == "decimals":
+            return decode(["uint8"], data)[0]
+        try:
+            return decode(["string"], data)[0]
+        except Exception:
+            # Older tokens (e.g., MKR) return bytes32 instead of string
+            return decode(["bytes32"], data)[0].rstrip(b"\x00").decode("utf-8") or None
+    except Exception:
+        return None
+
+
+def _has_multicall(web3: Web3, multicall_address: str) -> bool:
+    """Tells whether Multicall3 is deployed at ``multicall_address``, probing each chain only once."""
+    deployed = _multicall_deployed.setdefault(web3.provider, {})
+    key = multicall_address.lower()
+    if key not in deployed:
+        deployed[key] = len(web3.eth.get_code(web3.to_checksum_address(multicall_address))) > 0
+    return deployed[key]
+
+
+def getTokenMetadataBatch(
+    tokenAddresses: Iterable[str],
+    web3: Web3,
+    fields: Iterable[str] = ("decimals", "symbol", "name"),
+    multicall_address: Optional[str] = MULTICALL3_ADDRESS,
+    batch_size: int = 500
+) -> Dict[str, Dict]:
+    """
+    Get ERC20 metadata for many tokens in as few RPC round trips as possible
+    
+    All getter calls are packed into Multicall3 ``aggregate3`` calls with
+    ``allowFailure`` set, so one token without e.g. ``decimals()`` does not
+    fail the batch. When no Multicall3 contract is deployed at
+    ``multicall_address`` (e.g., on EthereumTesterProvider, or when it is
+    None) every getter is sent as its own ``eth_call`` instead. Whether it
+    is deployed is looked up once per provider, so after the first call a
+    batch costs one round trip per ``batch_size`` getters.
+    
+    Args:
+        tokenAddresses: Contract addresses of the tokens
+        web3: Web3 instance connected to a provider
+        fields: Metadata getters to call ('decimals', 'symbol', 'name')
+        multicall_address: Address of a Multicall3 deployment
+        batch_size: Maximum number of getter calls per aggregate3 call
+        
+    Returns:
+        dict: Lowercase token address -> {field: value}; value is None where the
+              getter reverted or returned undecodable data. The native token
+              placeholder (0xEeee...EEeE) always has 18 decimals.
+        
+    Raises:
+        ValueError: If an address is invalid, or a field is unknown
+    """
+    fields = list(fields)
+    for field in fields:
+        if field not in METADATA_SELECTORS:
+            raise ValueError(f"Unsupported metadata field: {field}")
+
+    results: Dict[str, Dict] = {}
+    calls = []
+    for tokenAddress in tokenAddresses:
+        if not web3.is_address(tokenAddress):
+            raise ValueError(f"Invalid token address: {tokenAddress}")
+        key = tokenAddress.lower()
+        results[key] = {field: None for field in fields}
+        if key == NATIVE_TOKEN_ADDRESS:
+            if "decimals" in results[key]:
+                results[key]["decimals"] = 18
+            continue
+        target = web3.to_checksum_address(tokenAddress)
+        calls.extend((key, target, field) for field in fields)
+
+    if not calls:
+        # Only the native token was asked for; nothing to probe or call
+        return results
+
+    use_multicall = multicall_address is not None and _has_multicall(web3, multicall_address)
+
+    if use_multicall:
+        multicall = web3.eth.contract(address=web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+        for start in range(0, len(calls), batch_size):
+            chunk = calls[start:start + batch_size]
+            responses = multicall.functions.aggregate3(
+                [(target, True, METADATA_SELECTORS[field]) for _, target, field in chunk]
+            ).call()
+            for (key, _, field), (success, data) in zip(chunk, responses):
+                if success:
+                    results[key][field] = _decode_metadata(field, data)
+    else:
+        for key, target, field in calls:
+            try:
+                data = web3.eth.call({"to": target, "data": METADATA_SELECTORS[field]})
+            except Exception:
+                continue
+            results[key][field] = _decode_metadata(field, bytes(data))
+
+    return results
+
     
 if __name__ == "__main__":
     print(getDecimals('0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913', Web3))
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""Process-wide pooled async HTTP client for KyberSwap and other upstream APIs.
+
+Every tool shares one ``httpx.AsyncClient`` so TCP/TLS connections to each host
+are set up once and kept alive. HTTP/2 is negotiated with hosts that offer it
+(``h2`` comes with the ``httpx[http2]`` dependency; without it the client falls
+back to HTTP/1.1), and a per-host semaphore caps how many requests are in
+flight to the same upstream.
+"""
+import asyncio
+import importlib.util
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+import resilience
+
+AGGREGATOR_DOMAIN = os.environ.get("KYBER_AGGREGATOR_URL", "https://aggregator-api.kyberswap.com")
+LIMIT_ORDER_DOMAIN = os.environ.get("KYBER_LIMIT_ORDER_URL", "https://limit-order.kyberswap.com")
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+REQUEST_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", 60))
+MAX_REQUESTS_PER_HOST = int(os.environ.get("HTTP_MAX_REQUESTS_PER_HOST", 16))
+
+
+class _LoopState:
+    # An AsyncClient and its semaphores belong to the event loop that created them
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(MAX_REQUESTS_PER_HOST)
+        return self.host_limits[host]
+
+
+_state: Optional[_LoopState] = None
+
+
+def _current_state() -> _LoopState:
+    global _state
+    loop = asyncio.get_running_loop()
+    if _state is None or _state.loop is not loop:
+        _state = _LoopState(loop)
+    return _state
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared client for the running event loop, creating it on first use."""
+    return _current_state().client
+
+
+async def _send(state: _LoopState, method: str, url: str, **kwargs) -> httpx.Response:
+    # One attempt: per-host limit, metrics, and the outcome fed to the host's circuit breaker
+    parts = urlsplit(url)
+    breaker = resilience.breaker(parts.netloc)
+    async with state.host_limit(parts.netloc):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await state.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as error:
+            status = type(error).__name__
+            breaker.record(ok=False)
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            breaker.abandon()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.upstream_latency.observe(elapsed, parts.netloc, parts.path)
+            metrics.upstream_requests.inc(parts.netloc, parts.path, status)
+    breaker.record(ok=not resilience.is_failure(response))
+    if not resilience.is_failure(response):
+        resilience.latency(parts.netloc, parts.path).observe(elapsed)
+    return response
+
+
+async def _send_hedged(state: _LoopState, method: str, url: str, **kwargs) -> httpx.Response:
+    # Past the endpoint's observed p95, race a duplicate against the slow request
+    parts = urlsplit(url)
+    delay = resilience.hedge_delay(parts.netloc, parts.path)
+    if delay is None:
+        return await _send(state, method, url, **kwargs)
+
+    first = asyncio.ensure_future(_send(state, method, url, **kwargs))
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    metrics.upstream_hedges.inc(parts.netloc, parts.path)
+    pending = {first, asyncio.ensure_future(_send(state, method, url, **kwargs))}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request through the shared client, respecting the per-host in-flight limit.
+
+    Calls to a host whose circuit breaker is open fail fast. GETs are
+    idempotent, so they are also hedged past the endpoint's p95 latency and
+    retried with jittered backoff on transport errors and 429/5xx responses.
+
+    Args:
+        method: HTTP method (e.g., "GET", "POST")
+        url: Absolute URL
+        **kwargs: Passed through to ``httpx.AsyncClient.request`` (params, json, headers, timeout...)
+
+    Returns:
+        httpx.Response: The response; status is not checked
+
+    Raises:
+        resilience.CircuitOpenError: If the host's circuit breaker is open
+        httpx.TransportError: If the last attempt failed to get a response
+    """
+    state = _current_state()
+    breaker = resilience.breaker(urlsplit(url).netloc)
+    if method.upper() != "GET":
+        breaker.before()
+        return await _send(state, method, url, **kwargs)
+
+    attempt = 0
+    while True:
+        breaker.before()
+        try:
+            response = await _send_hedged(state, method, url, **kwargs)
+        except resilience.CircuitOpenError:
+            raise
+        except httpx.TransportError:
+            if attempt >= resilience.RETRIES:
+                raise
+        else:
+            if not resilience.is_failure(response) or attempt >= resilience.RETRIES:
+                return response
+        await asyncio.sleep(resilience.backoff(attempt))
+        attempt += 1
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+
+async def aclose():
+    """Closes the shared client and its pooled connections."""
+    global _state
+    if _state is not None:
+        await _state.client.aclose()
+        _state = None
+
+
+_lifespan_users = 0
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """FastMCP lifespan that closes the shared client when the server stops.
+
+    Over HTTP the lifespan is entered once for the process and once per client
+    session, so the client is only closed when the last of them exits.
+    """
+    global _lifespan_users
+    _lifespan_users += 1
+    try:
+        yield {}
+    finally:
+        _lifespan_users -= 1
+        if _lifespan_users == 0:
+            await aclose()
+
+
+def error_text(error: httpx.HTTPError) -> str:
+    """Returns the upstream response body for status errors, the error message otherwise."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.text
+    return str(error)
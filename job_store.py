@@ -0,0 +1,196 @@
+"""SQLite-backed store for conditional swap jobs.
+
+Jobs outlive the MCP request that created them, and the server process
+too: watching jobs are read back on startup and monitoring resumes.
+
+Several server processes may share one store (pooled stdio children, side by
+side agent runs). A watching job belongs to the process holding its lease;
+the owner renews it while it watches, and another process may only claim the
+job once the lease has run out.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+JOB_STORE_PATH = os.environ.get(
+    "JOB_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs.sqlite3")
+)
+
+# A job is 'watching' until it ends in one of the final states
+ACTIVE_STATUSES = ('watching',)
+FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+_COLUMNS = (
+    'id', 'status', 'chain', 'token_in', 'token_out', 'amount_in', 'min_price', 'slippage',
+    'created_at', 'expires_at', 'updated_at', 'checks', 'last_price', 'result', 'error',
+    'owner', 'lease_until'
+)
+
+# Added after the first release; older stores get them on open
+_LEASE_COLUMNS = (('owner', 'TEXT'), ('lease_until', 'REAL'))
+
+
+class JobStore:
+    def __init__(self, path: str = JOB_STORE_PATH):
+        """
+        Args:
+            path: SQLite database file; ":memory:" for a throwaway store
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS conditional_swaps (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    chain TEXT NOT NULL,
+                    token_in TEXT NOT NULL,
+                    token_out TEXT NOT NULL,
+                    amount_in TEXT NOT NULL,
+                    min_price TEXT NOT NULL,
+                    slippage INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    checks INTEGER NOT NULL DEFAULT 0,
+                    last_price TEXT,
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    lease_until REAL
+                )
+            """)
+            existing = {row['name'] for row in self._db.execute("PRAGMA table_info(conditional_swaps)")}
+            for column, kind in _LEASE_COLUMNS:
+                if column not in existing:
+                    self._db.execute(f"ALTER TABLE conditional_swaps ADD COLUMN {column} {kind}")
+            self._db.execute("CREATE INDEX IF NOT EXISTS conditional_swaps_status ON conditional_swaps (status)")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        # Token amounts exceed SQLite's 64-bit integers, so they are stored as text
+        job['amount_in'] = int(job['amount_in'])
+        job['min_price'] = int(job['min_price'])
+        job['last_price'] = int(job['last_price']) if job['last_price'] is not None else None
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def create(self, chain: str, token_in: str, token_out: str, amount_in: int, min_price: int,
+               slippage: int, expires_in: float, owner: Optional[str] = None, lease: float = 0.0) -> Dict[str, Any]:
+        """Inserts a new 'watching' job, leased to ``owner`` for ``lease`` seconds, and returns it."""
+        now = time.time()
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'status': 'watching',
+            'chain': chain,
+            'token_in': token_in,
+            'token_out': token_out,
+            'amount_in': str(amount_in),
+            'min_price': str(min_price),
+            'slippage': int(slippage),
+            'created_at': now,
+            'expires_at': now + expires_in,
+            'updated_at': now,
+            'checks': 0,
+            'last_price': None,
+            'result': None,
+            'error': None,
+            'owner': owner,
+            'lease_until': now + lease if owner is not None else None,
+        }
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT INTO conditional_swaps ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                [job[column] for column in _COLUMNS]
+            )
+        return self.get(job['id'])
+
+    def update(self, job_id: str, only_if_active: bool = False, owner: Optional[str] = None, **fields) -> bool:
+        """Updates a job's fields. Returns False if no job was updated.
+
+        Args:
+            job_id: Job to update
+            only_if_active: Leave jobs that already reached a final state untouched
+            owner: Only update the job while this owner holds it
+            **fields: Columns to set; ``result`` is stored as JSON
+        """
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'])
+        for column in ('amount_in', 'min_price', 'last_price'):
+            if fields.get(column) is not None:
+                fields[column] = str(fields[column])
+        fields['updated_at'] = time.time()
+
+        query = f"UPDATE conditional_swaps SET {', '.join(f'{column} = ?' for column in fields)} WHERE id = ?"
+        params = list(fields.values()) + [job_id]
+        if only_if_active:
+            query += f" AND status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})"
+            params += list(ACTIVE_STATUSES)
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        with self._lock, self._db:
+            return self._db.execute(query, params).rowcount > 0
+
+    def claim(self, job_id: str, owner: str, lease: float) -> bool:
+        """Takes a watching job whose lease has run out (or that has no owner) for ``lease`` seconds.
+
+        Returns:
+            bool: True if ``owner`` holds the job now
+        """
+        now = time.time()
+        query = (
+            "UPDATE conditional_swaps SET owner = ?, lease_until = ? WHERE id = ?"
+            f" AND status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})"
+            " AND (owner IS NULL OR owner = ? OR lease_until IS NULL OR lease_until < ?)"
+        )
+        with self._lock, self._db:
+            return self._db.execute(query, [owner, now + lease, job_id, *ACTIVE_STATUSES, owner, now]).rowcount > 0
+
+    def renew(self, owner: str, lease: float) -> List[str]:
+        """Extends the lease of every watching job ``owner`` holds and returns their ids."""
+        active = f"status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})"
+        with self._lock, self._db:
+            self._db.execute(
+                f"UPDATE conditional_swaps SET lease_until = ? WHERE owner = ? AND {active}",
+                [time.time() + lease, owner, *ACTIVE_STATUSES]
+            )
+            rows = self._db.execute(
+                f"SELECT id FROM conditional_swaps WHERE owner = ? AND {active}", [owner, *ACTIVE_STATUSES]
+            ).fetchall()
+        return [row['id'] for row in rows]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM conditional_swaps WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Returns the most recent jobs, optionally only those with the given status."""
+        query = "SELECT * FROM conditional_swaps"
+        params: list = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def active(self) -> List[Dict[str, Any]]:
+        """Returns every job that is still being watched."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM conditional_swaps WHERE status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})",
+                ACTIVE_STATUSES
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
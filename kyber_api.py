@@ -0,0 +1,77 @@
+"""KyberSwap aggregator calls shared by the swap tools.
+
+Route quotes go through a short-lived TTL cache with single-flight
+coalescing, so identical quote requests from several agent sessions within
+the TTL cost one upstream ``/routes`` call.
+"""
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import http_client
+from http_client import AGGREGATOR_DOMAIN
+from ttl_cache import TTLCache
+
+QUOTE_CACHE_TTL = float(os.environ.get("QUOTE_CACHE_TTL", 2.0))
+QUOTE_CACHE_MAX_ENTRIES = int(os.environ.get("QUOTE_CACHE_MAX_ENTRIES", 1024))
+
+quote_cache = TTLCache(ttl=QUOTE_CACHE_TTL, max_entries=QUOTE_CACHE_MAX_ENTRIES, name="quotes")
+
+
+async def fetch_route(targetChain: str, tokenIn: str, tokenOut: str, amount_in: int) -> Dict[str, Any]:
+    """GETs a fresh route from ``/{chain}/api/v1/routes``.
+
+    Raises:
+        httpx.HTTPError: On transport errors or non-2xx responses
+    """
+    response = await http_client.get(
+        f"{AGGREGATOR_DOMAIN}/{targetChain}/api/v1/routes",
+        params={
+            "tokenIn": tokenIn,
+            "tokenOut": tokenOut,
+            "amountIn": str(amount_in)
+        }
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_route(targetChain: str, tokenIn: str, tokenOut: str, amount_in: int,
+                    max_age: Optional[float] = None) -> Tuple[Dict[str, Any], float]:
+    """Returns a route quote, reusing one fetched within the last ``QUOTE_CACHE_TTL`` seconds.
+
+    Args:
+        targetChain: Chain name (e.g., "base")
+        tokenIn: Input token address
+        tokenOut: Output token address
+        amount_in: Input amount in the token's smallest units
+        max_age: Optionally accept only cached quotes younger than this many seconds
+
+    Returns:
+        tuple: (``/routes`` response JSON, age of the quote in seconds)
+
+    Raises:
+        httpx.HTTPError: On transport errors or non-2xx responses
+    """
+    key = (targetChain.lower(), tokenIn.lower(), tokenOut.lower(), int(amount_in))
+    return await quote_cache.get_or_fetch(
+        key, lambda: fetch_route(targetChain, tokenIn, tokenOut, amount_in), max_age=max_age
+    )
+
+
+async def build_route(targetChain: str, routeSummary: Dict[str, Any], sender: str, recipient: str, slippage) -> Dict[str, Any]:
+    """POSTs a route summary to ``/{chain}/api/v1/route/build`` and returns the response JSON.
+
+    Raises:
+        httpx.HTTPError: On transport errors or non-2xx responses
+    """
+    response = await http_client.post(
+        f"{AGGREGATOR_DOMAIN}/{targetChain}/api/v1/route/build",
+        json={
+            "routeSummary": routeSummary,
+            "sender": sender,
+            "recipient": recipient,
+            "slippageTolerance": slippage
+        }
+    )
+    response.raise_for_status()
+    return response.json()
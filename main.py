@@ -1,30 +1,48 @@
-from mcp import ClientSession , StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
 
 from langchain_anthropic import ChatAnthropic
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
-import asyncio  
+import asyncio
+import os
 
-async def main():
-    model = ChatAnthropic(model="claude-3-5-sonnet-latest")
+from session_pool import SessionPool
+from tool_cache import cache_tools
+from tool_executor import ToolExecutor
 
-    server_parameters= StdioServerParameters(
+QUESTIONS = [
+    "How has ETH-USD price moved in staring from 1st march 2025 to 30th march 2025?",
+]
+
+def server_target():
+    # MCP_SERVER_URL points at a running `server.py --transport sse`; otherwise spawn stdio children
+    url = os.environ.get("MCP_SERVER_URL")
+    if url:
+        return url
+    return StdioServerParameters(
         command='uv',
         args=['run', 'server.py'],
         env=None,
     )
 
-    async with stdio_client(server_parameters) as (read, write):
-        async with ClientSession(read, write) as session:
+async def ask(agent, question):
+    return await agent.ainvoke({"messages": question})
+
+async def main():
+    model = ChatAnthropic(model="claude-3-5-sonnet-latest")
+
+    # Every question shares the pool's warm sessions; each tool call borrows one.
+    # Repeat price and quote calls are answered from the in-process cache, and
+    # the calls the model makes in one turn run side by side up to TOOL_FAN_OUT
+    executor = ToolExecutor()
+    async with SessionPool(server_target()) as pool:
+        tools = cache_tools(executor.limit(await load_mcp_tools(pool)))
+        agent = create_react_agent(model, tools)
+        agent_responses = await asyncio.gather(*(ask(agent, question) for question in QUESTIONS))
 
-            await session.initialize()
-            tools = await load_mcp_tools(session)
-            agent = create_react_agent(model,tools)
-            agent_response = await agent.ainvoke({"messages":"How has ETH-USD price moved in staring from 1st march 2025 to 30th march 2025?"})
-    
-    for m in agent_response["messages"]:
-        m.pretty_print()
+    for agent_response in agent_responses:
+        for m in agent_response["messages"]:
+            m.pretty_print()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,214 @@
+"""In-process metrics for tools, upstream calls, caches and price watches.
+
+Counters, latency histograms and callback gauges are kept in memory and can
+be read as a JSON-friendly snapshot (the get_server_metrics tool and the
+metrics://snapshot resource) or rendered in the Prometheus text format (the
+/metrics endpoint in HTTP mode). Recording is thread-safe, so the tool pool
+and download threads can record too.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp import FastMCP
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans cache hits (sub-millisecond) to slow price downloads
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum, count]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        with _lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def quantile(self, labels: LabelValues, q: float) -> Optional[float]:
+        """Estimates a quantile by linear interpolation inside its bucket."""
+        with _lock:
+            entry = self.values.get(labels)
+            if entry is None or entry[2] == 0:
+                return None
+            counts, total = entry[0][:], entry[2]
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # Beyond the last bucket there is no upper bound to interpolate to
+        return lower
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = [(labels, entry[0][:], entry[1], entry[2]) for labels, entry in sorted(self.values.items())]
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge read from a callback at collection time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.read():g}"]
+
+
+tool_calls = Counter("mcp_tool_calls_total", "MCP tool calls by outcome", ("tool", "status"))
+tool_latency = Histogram("mcp_tool_duration_seconds", "MCP tool call latency", ("tool",))
+upstream_requests = Counter("upstream_requests_total", "Upstream HTTP requests by response status",
+                            ("host", "endpoint", "status"))
+upstream_hedges = Counter("upstream_hedged_requests_total", "Duplicate requests sent past the p95 latency",
+                          ("host", "endpoint"))
+upstream_latency = Histogram("upstream_request_duration_seconds", "Upstream HTTP request latency", ("host", "endpoint"))
+cache_lookups = Counter("cache_lookups_total", "Cache lookups by result (hit, miss, coalesced)", ("cache", "result"))
+gauges: Dict[str, Gauge] = {}
+
+
+def register_gauge(name: str, help: str, read: Callable[[], float]):
+    gauges[name] = Gauge(name, help, read)
+
+
+def record_cache(cache: str, result: str, count: int = 1):
+    if count:
+        cache_lookups.inc(cache, result, amount=count)
+
+
+def render_prometheus() -> str:
+    """Returns every metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in (tool_calls, tool_latency, upstream_requests, upstream_hedges, upstream_latency, cache_lookups,
+                   *gauges.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _latency_summary(histogram: Histogram, labels: LabelValues) -> Dict[str, Optional[float]]:
+    with _lock:
+        _, total, count = histogram.values.get(labels, [None, 0.0, 0])
+
+    def ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 3) if seconds is not None else None
+
+    return {
+        "meanMs": ms(total / count) if count else None,
+        "p50Ms": ms(histogram.quantile(labels, 0.5)),
+        "p99Ms": ms(histogram.quantile(labels, 0.99)),
+    }
+
+
+def snapshot() -> Dict:
+    """Returns the metrics as nested dicts, with latency quantiles estimated from the histograms."""
+    with _lock:
+        tool_counts = dict(tool_calls.values)
+        upstream_counts = dict(upstream_requests.values)
+        cache_counts = dict(cache_lookups.values)
+
+    tools: Dict[str, Dict] = {}
+    for (tool, status), count in tool_counts.items():
+        entry = tools.setdefault(tool, {"calls": 0, "errors": 0})
+        entry["calls"] += int(count)
+        if status != "ok":
+            entry["errors"] += int(count)
+    for tool, entry in tools.items():
+        entry.update(_latency_summary(tool_latency, (tool,)))
+
+    upstream: Dict[str, Dict] = {}
+    for (host, endpoint, status), count in upstream_counts.items():
+        entry = upstream.setdefault(f"{host}{endpoint}", {"requests": 0, "errors": 0, "statuses": {}})
+        entry["requests"] += int(count)
+        entry["statuses"][status] = entry["statuses"].get(status, 0) + int(count)
+        if not status.startswith("2"):
+            entry["errors"] += int(count)
+        entry.update(_latency_summary(upstream_latency, (host, endpoint)))
+
+    caches: Dict[str, Dict] = {}
+    for (cache, result), count in cache_counts.items():
+        caches.setdefault(cache, {})[result] = int(count)
+    for counts in caches.values():
+        lookups = sum(counts.values())
+        counts["hitRatio"] = round((counts.get("hit", 0) + counts.get("coalesced", 0)) / lookups, 4) if lookups else None
+
+    return {
+        "tools": tools,
+        "upstream": upstream,
+        "caches": caches,
+        "gauges": {name: gauge.read() for name, gauge in gauges.items()},
+    }
+
+
+class MeteredFastMCP(FastMCP):
+    """FastMCP server that records the call count, errors and latency of every tool."""
+
+    async def call_tool(self, name, arguments):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await super().call_tool(name, arguments)
+            status = "ok"
+            return result
+        finally:
+            tool_latency.observe(time.perf_counter() - started, name)
+            tool_calls.inc(name, status)
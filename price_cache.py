@@ -0,0 +1,256 @@
+"""On-disk OHLCV cache for yfinance price history.
+
+Bars are stored column by column in one ``.npz`` file per (ticker, interval),
+together with the date ranges that have already been downloaded. Later
+requests only fetch the parts of the range that are not covered yet.
+"""
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+CACHE_DIR = os.environ.get(
+    "PRICE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".price_cache")
+)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Bars younger than one interval may still change, so they are never marked as covered
+INTERVAL_LENGTHS = {
+    '1m': timedelta(minutes=1),
+    '2m': timedelta(minutes=2),
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '30m': timedelta(minutes=30),
+    '60m': timedelta(hours=1),
+    '90m': timedelta(minutes=90),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+    '5d': timedelta(days=5),
+    '1wk': timedelta(weeks=1),
+    '1mo': timedelta(days=31),
+    '3mo': timedelta(days=92),
+}
+
+Range = Tuple[datetime, datetime]
+Fetcher = Callable[[str, datetime, datetime, str], pd.DataFrame]
+ManyFetcher = Callable[[List[str], datetime, datetime, str], Dict[str, pd.DataFrame]]
+
+
+def empty_frame() -> pd.DataFrame:
+    """Returns an empty frame with the cache's Date + OHLCV layout."""
+    frame = pd.DataFrame({column: pd.Series(dtype='float64') for column in OHLCV_COLUMNS})
+    frame.insert(0, 'Date', pd.Series(dtype='datetime64[ns]'))
+    return frame
+
+
+def missing_ranges(covered: List[Range], start: datetime, end: datetime) -> List[Range]:
+    """Returns the parts of [start, end) that are not inside any covered range."""
+    gaps = []
+    cursor = start
+    for lo, hi in sorted(covered):
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = hi
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Coalesces overlapping or touching ranges."""
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def unfetched_ranges(batches: List[Tuple[Range, pd.DataFrame]]) -> List[Range]:
+    """Returns the parts of the fetched gaps that came back without an answer.
+
+    A gap counts as unfetched when no frame came back for it at all, or when
+    its frame lists the part in ``attrs['failed_windows']``.
+    """
+    unfetched = []
+    for (gap_start, gap_end), batch in batches:
+        if batch is None:
+            unfetched.append((gap_start, gap_end))
+            continue
+        for lo, hi in batch.attrs.get('failed_windows', []):
+            lo, hi = max(lo, gap_start), min(hi, gap_end)
+            if lo < hi:
+                unfetched.append((lo, hi))
+    return merge_ranges(unfetched)
+
+
+class PriceCache:
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        """
+        Args:
+            cache_dir: Directory holding one ``.npz`` file per (ticker, interval)
+        """
+        self.cache_dir = cache_dir
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, ticker: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    def _path(self, ticker: str, interval: str) -> str:
+        safe_ticker = re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+        return os.path.join(self.cache_dir, f"{safe_ticker}_{interval}.npz")
+
+    def load(self, ticker: str, interval: str) -> Tuple[pd.DataFrame, List[Range]]:
+        """Reads the cached bars and covered ranges for a ticker/interval pair."""
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return empty_frame(), []
+
+        with np.load(path) as stored:
+            frame = pd.DataFrame({'Date': pd.to_datetime(stored['Date'])})
+            for column in OHLCV_COLUMNS:
+                frame[column] = stored[column]
+            covered = [
+                (pd.Timestamp(lo).to_pydatetime(), pd.Timestamp(hi).to_pydatetime())
+                for lo, hi in stored['covered']
+            ]
+        return frame, covered
+
+    def save(self, ticker: str, interval: str, frame: pd.DataFrame, covered: List[Range]):
+        """Atomically writes bars and covered ranges for a ticker/interval pair."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(ticker, interval)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        columns = {'Date': frame['Date'].to_numpy(dtype='datetime64[ns]')}
+        for column in OHLCV_COLUMNS:
+            columns[column] = frame[column].to_numpy(dtype='float64')
+        columns['covered'] = np.array(covered, dtype='datetime64[ns]').reshape(-1, 2)
+
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+
+    def _merge(self, ticker: str, interval: str, frame: pd.DataFrame, covered: List[Range], batches: List[Tuple[Range, pd.DataFrame]]) -> pd.DataFrame:
+        """Merges freshly fetched bars into the cached ones and persists the result."""
+        # Never mark bars that can still change as covered
+        settled_until = datetime.now() - INTERVAL_LENGTHS.get(interval, timedelta(0))
+        fetched = []
+        covered_before = len(covered)
+        for (gap_start, gap_end), batch in batches:
+            if batch is None:
+                continue
+            # Windows the fetcher gave up on stay uncovered and are retried next time;
+            # windows that came back without bars are covered like any other
+            failed = batch.attrs.get('failed_windows', [])
+            covered.extend(missing_ranges(failed, gap_start, min(gap_end, settled_until)))
+            if not batch.empty:
+                fetched.append(batch[['Date'] + OHLCV_COLUMNS])
+
+        if not fetched:
+            if len(covered) > covered_before:
+                self.save(ticker, interval, frame, merge_ranges(covered))
+            return frame
+
+        parts = ([frame] if not frame.empty else []) + fetched
+        frame = pd.concat(parts, ignore_index=True)
+        # Freshly downloaded bars win over cached ones
+        frame = frame[~frame['Date'].duplicated(keep='last')]
+        frame = frame.sort_values('Date').reset_index(drop=True)
+        self.save(ticker, interval, frame, merge_ranges(covered))
+        return frame
+
+    def get(self, ticker: str, interval: str, start: datetime, end: datetime, fetch: Fetcher) -> pd.DataFrame:
+        """Returns Date + OHLCV bars in [start, end), downloading only uncovered ranges.
+
+        Args:
+            ticker: The trading pair symbol (e.g., "ETH-USD")
+            interval: yfinance interval string (e.g., "1d", "1m")
+            start: Inclusive start of the requested range
+            end: Exclusive end of the requested range
+            fetch: Called as ``fetch(ticker, start, end, interval)`` for every
+                missing range; must return a Date + OHLCV frame, optionally
+                listing unfetched sub-ranges in ``attrs['failed_windows']``
+
+        Returns:
+            pandas.DataFrame: Date + OHLCV bars sorted by Date; parts of the
+                range that could not be downloaded are listed in
+                ``attrs['missing_ranges']``
+        """
+        with self._lock(ticker, interval):
+            frame, covered = self.load(ticker, interval)
+            gaps = missing_ranges(covered, start, end)
+            metrics.record_cache("prices", "miss" if gaps else "hit")
+            batches = [(gap, fetch(ticker, gap[0], gap[1], interval)) for gap in gaps]
+            frame = self._merge(ticker, interval, frame, covered, batches)
+
+        in_range = (frame['Date'] >= start) & (frame['Date'] < end)
+        frame = frame.loc[in_range].reset_index(drop=True)
+        frame.attrs['missing_ranges'] = unfetched_ranges(batches)
+        return frame
+
+    def get_many(self, tickers: List[str], interval: str, start: datetime, end: datetime, fetch_many: ManyFetcher) -> Dict[str, pd.DataFrame]:
+        """Batch variant of ``get`` that downloads missing ranges for many tickers at once.
+
+        Tickers missing the same ranges are fetched together, so a cold cache
+        costs one ``fetch_many`` call per missing range rather than one per ticker.
+
+        Args:
+            tickers: Trading pair symbols (e.g., ["ETH-USD", "BTC-USD"])
+            interval: yfinance interval string (e.g., "1d", "1m")
+            start: Inclusive start of the requested range
+            end: Exclusive end of the requested range
+            fetch_many: Called as ``fetch_many(tickers, start, end, interval)``;
+                must return a dict of ticker -> Date + OHLCV frame
+
+        Returns:
+            dict: ticker -> Date + OHLCV bars in [start, end) sorted by Date,
+                with ``attrs['missing_ranges']`` as in ``get``
+        """
+        tickers = list(dict.fromkeys(tickers))
+        # Lock in a fixed order so concurrent batches cannot deadlock
+        locks = [self._lock(ticker, interval) for ticker in sorted(tickers)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            cached = {ticker: self.load(ticker, interval) for ticker in tickers}
+            groups: Dict[Tuple[Range, ...], List[str]] = {}
+            for ticker, (_, covered) in cached.items():
+                gaps = tuple(missing_ranges(covered, start, end))
+                metrics.record_cache("prices", "miss" if gaps else "hit")
+                groups.setdefault(gaps, []).append(ticker)
+
+            batches: Dict[str, List[Tuple[Range, pd.DataFrame]]] = {ticker: [] for ticker in tickers}
+            for gaps, group in groups.items():
+                for gap in gaps:
+                    fetched = fetch_many(group, gap[0], gap[1], interval)
+                    for ticker in group:
+                        batches[ticker].append((gap, fetched.get(ticker)))
+
+            frames = {}
+            for ticker, (frame, covered) in cached.items():
+                frame = self._merge(ticker, interval, frame, covered, batches[ticker])
+                in_range = (frame['Date'] >= start) & (frame['Date'] < end)
+                frames[ticker] = frame.loc[in_range].reset_index(drop=True)
+                frames[ticker].attrs['missing_ranges'] = unfetched_ranges(batches[ticker])
+            return frames
+        finally:
+            for lock in reversed(locks):
+                lock.release()
@@ -0,0 +1,270 @@
+"""Concurrent, rate-limited yfinance downloads.
+
+Intraday history has to be requested in windows yfinance accepts. The windows
+are fetched on a shared, bounded thread pool, spaced out by one process-wide
+rate limiter, and retried individually when they fail.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+
+from price_cache import OHLCV_COLUMNS, empty_frame
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("YF_MAX_WORKERS", 4))
+REQUESTS_PER_SECOND = float(os.environ.get("YF_REQUESTS_PER_SECOND", 4))
+MAX_RETRIES = int(os.environ.get("YF_MAX_RETRIES", 2))
+RETRY_BACKOFF = 1.0  # seconds, doubled on every retry
+
+# Largest window yfinance serves in one request for each intraday interval
+BATCH_SIZES = {
+    '1m': timedelta(days=7),
+    '2m': timedelta(days=60),
+    '5m': timedelta(days=60),
+    '15m': timedelta(days=60),
+    '30m': timedelta(days=60),
+    '1h': timedelta(days=730)
+}
+
+Window = Tuple[datetime, datetime]
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Maximum number of calls started per second, shared by all threads
+        """
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1):
+        """Blocks until the caller may start its next ``count`` calls."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval * count
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SharedLock:
+    def __init__(self):
+        """Lock any number of threads may hold shared, or one thread exclusively."""
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            # Waiting exclusive holders go first so a steady stream of shared ones cannot starve them
+            while self._exclusive or self._waiting:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                if not self._shared:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="yf-download")
+# yf.download resets and then reads yfinance's module-level shared._DFS/_ERRORS, and
+# Ticker.history writes to them on its error paths. History calls only ever write,
+# so they may overlap each other (shared) but never a yf.download (exclusive).
+download_lock = SharedLock()
+
+
+def split_windows(start: datetime, end: datetime, interval: str) -> List[Window]:
+    """Splits [start, end) into consecutive windows small enough for one yfinance request."""
+    delta = BATCH_SIZES.get(interval)
+    if delta is None:
+        return [(start, end)]
+
+    windows = []
+    current_start = start
+    while current_start < end:
+        current_end = min(current_start + delta, end)
+        windows.append((current_start, current_end))
+        current_start = current_end
+    return windows
+
+
+def fetch_windows(fetch: Callable[[datetime, datetime], pd.DataFrame], windows: List[Window], cost: int = 1) -> Tuple[List[Optional[pd.DataFrame]], List[Window]]:
+    """Fetches every window concurrently, retrying failed windows on their own.
+
+    A window fails only when ``fetch`` raises. An empty result is a valid
+    answer (a weekend, dates before a ticker was listed, intraday history
+    Yahoo no longer keeps) and is not retried.
+
+    Args:
+        fetch: Called as ``fetch(window_start, window_end)``
+        windows: Windows to fetch, in order
+        cost: Upstream requests one ``fetch`` call makes, charged to the rate limiter
+
+    Returns:
+        tuple: (results in window order, None where the window failed;
+                windows that still failed after all retries)
+    """
+    def attempt(window: Window) -> Optional[pd.DataFrame]:
+        delay = RETRY_BACKOFF
+        for retry in range(MAX_RETRIES + 1):
+            if retry:
+                time.sleep(delay)
+                delay *= 2
+            rate_limiter.acquire(cost)
+            try:
+                batch = fetch(*window)
+                return batch if batch is not None else pd.DataFrame()
+            except Exception as e:
+                logger.warning("Error fetching %s to %s (attempt %d): %s", window[0], window[1], retry + 1, e)
+        return None
+
+    results = list(executor.map(attempt, windows))
+    failed = [window for window, result in zip(windows, results) if result is None]
+    return results, failed
+
+
+def _no_prices(error) -> bool:
+    # Yahoo answered but has no bars for the range; a status code means it did not really answer
+    text = str(error)
+    return "no price data found" in text and "status_code" not in text
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    # Keep exchange-local wall time, like yf.download(ignore_tz=True)
+    if frame.index.tz is not None:
+        frame.index = frame.index.tz_localize(None)
+    # yfinance names the index 'Datetime' for intraday bars
+    frame.index.name = 'Date'
+    frame = frame[OHLCV_COLUMNS].reset_index()
+    frame.columns.name = None
+    return frame
+
+
+def _merge_windows(data_frames: List[pd.DataFrame], failed: List[Window]) -> pd.DataFrame:
+    if not data_frames:
+        full_data = empty_frame()
+    else:
+        # Windows are merged in order, so keeping the first duplicate keeps the earlier window's bar
+        full_data = pd.concat(data_frames, ignore_index=True)
+        full_data = full_data[~full_data['Date'].duplicated(keep='first')]
+        full_data = full_data.sort_values('Date').reset_index(drop=True)
+    full_data.attrs['failed_windows'] = failed
+    return full_data
+
+
+def download_ohlcv(ticker: str, start: datetime, end: datetime, interval: str) -> pd.DataFrame:
+    """Downloads Date + OHLCV bars for one ticker from yfinance.
+
+    Windows that failed after all retries are listed in
+    ``frame.attrs['failed_windows']`` so callers do not treat them as covered.
+    """
+    def fetch(window_start, window_end):
+        # Unlike yf.download, Ticker.history raises its errors, but it still
+        # records them in yfinance's shared state, see download_lock
+        try:
+            with download_lock.shared():
+                return yf.Ticker(ticker).history(
+                    start=window_start,
+                    end=window_end,
+                    interval=interval,
+                    actions=False,
+                    raise_errors=True
+                )
+        except YFPricesMissingError as e:
+            if _no_prices(e):
+                return None
+            raise
+
+    windows = split_windows(start, end, interval)
+    results, failed = fetch_windows(fetch, windows)
+    data_frames = [_normalize(batch) for batch in results if batch is not None and not batch.empty]
+
+    if failed:
+        logger.warning("Giving up on %d of %d %s windows for %s: %s", len(failed), len(windows), interval, ticker, failed)
+
+    return _merge_windows(data_frames, failed)
+
+
+def download_ohlcv_many(tickers: List[str], start: datetime, end: datetime, interval: str) -> Dict[str, pd.DataFrame]:
+    """Downloads Date + OHLCV bars for several tickers with yfinance's multi-ticker download.
+
+    Every window is one ``yf.download`` call for all tickers. A ticker whose
+    download failed in a window gets that window listed in its
+    ``attrs['failed_windows']``; a ticker Yahoo simply has no bars for does not.
+
+    Returns:
+        dict: ticker -> Date + OHLCV frame
+    """
+    def fetch(window_start, window_end):
+        with download_lock.exclusive():
+            batch = yf.download(
+                tickers=tickers,
+                start=window_start,
+                end=window_end,
+                interval=interval,
+                progress=False,
+                ignore_tz=True,
+                group_by='ticker',
+                multi_level_index=True
+            )
+            # yf.download reports per-ticker failures here instead of raising
+            errors = {ticker: error for ticker, error in yf.shared._ERRORS.items() if not _no_prices(error)}
+            if len(errors) == len(tickers):
+                raise RuntimeError(f"yf.download failed: {errors}")
+            return batch, errors
+
+    windows = split_windows(start, end, interval)
+    results, _ = fetch_windows(fetch, windows, cost=len(tickers))
+
+    frames = {}
+    for ticker in tickers:
+        data_frames = []
+        failed = []
+        for window, result in zip(windows, results):
+            if result is None or ticker in result[1]:
+                failed.append(window)
+                continue
+            batch = result[0]
+            if ticker not in batch.columns.get_level_values(0):
+                continue
+            ticker_batch = batch[ticker].dropna(how='all')
+            if not ticker_batch.empty:
+                data_frames.append(_normalize(ticker_batch))
+
+        if failed:
+            logger.warning("Giving up on %d of %d %s windows for %s: %s", len(failed), len(windows), interval, ticker, failed)
+        frames[ticker] = _merge_windows(data_frames, failed)
+    return frames
@@ -0,0 +1,108 @@
+"""Price-impact curves from a ladder of KyberSwap quotes for one pair.
+
+All sizes are quoted concurrently through the shared route cache, with at
+most ``MAX_IN_FLIGHT`` requests outstanding so a long ladder cannot crowd
+out other tools' calls to the aggregator.
+"""
+import asyncio
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import httpx
+
+import http_client
+import kyber_api
+from token_registry import registry
+
+MAX_IN_FLIGHT = int(os.environ.get("PRICE_IMPACT_MAX_IN_FLIGHT", 4))
+MAX_STEPS = 50
+
+
+def _amount(value: Union[str, float, Decimal]) -> Decimal:
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value}") from None
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError(f"Amounts must be positive: {value}")
+    return amount
+
+
+def amount_ladder(min_amount: Union[str, float], max_amount: Union[str, float], steps: int) -> List[Decimal]:
+    """Returns ``steps`` geometrically spaced amounts from ``min_amount`` to ``max_amount``.
+
+    Geometric spacing gives every order of magnitude the same resolution,
+    which is where price impact changes shape.
+    """
+    low, high = _amount(min_amount), _amount(max_amount)
+    if high < low:
+        raise ValueError("min_amount must not exceed max_amount")
+    if steps < 2 or low == high:
+        return [low]
+    ratio = (high / low) ** (Decimal(1) / (steps - 1))
+    return [low * ratio ** i for i in range(steps - 1)] + [high]
+
+
+async def price_impact_curve(chain: str, tokenIn: str, tokenOut: str, amounts: Sequence[Union[str, float, Decimal]],
+                             max_in_flight: int = MAX_IN_FLIGHT) -> Dict[str, Any]:
+    """Quotes every amount and derives the effective and marginal rate per size.
+
+    Args:
+        chain: Chain name (e.g., "base")
+        tokenIn: Input token address
+        tokenOut: Output token address
+        amounts: Input amounts in human-readable units
+        max_in_flight: Most quotes requested at the same time
+
+    Returns:
+        dict:
+            - curve: One point per quoted size, smallest first, with amountIn,
+              outputAmount, effectiveRate (output per input), marginalRate
+              (extra output per extra input since the previous size) and
+              priceImpact (effective rate shortfall against the smallest size)
+            - errors: Sizes that could not be quoted
+    """
+    amounts = sorted(set(_amount(amount) for amount in amounts))
+    if not amounts:
+        raise ValueError("No amounts to quote")
+    if len(amounts) > MAX_STEPS:
+        raise ValueError(f"At most {MAX_STEPS} amounts can be quoted at once")
+    decimals_in, decimals_out = await asyncio.gather(
+        registry.aget_decimals(chain, tokenIn), registry.aget_decimals(chain, tokenOut)
+    )
+    limit = asyncio.Semaphore(max_in_flight)
+
+    async def quote(amount: Decimal) -> Decimal:
+        async with limit:
+            data, _ = await kyber_api.get_route(chain, tokenIn, tokenOut, int(amount * (10 ** decimals_in)))
+        return Decimal(data['data']['routeSummary']['amountOut']) / (10 ** decimals_out)
+
+    results = await asyncio.gather(*(quote(amount) for amount in amounts), return_exceptions=True)
+
+    curve: List[Dict[str, Any]] = []
+    errors = []
+    previous: Optional[Dict[str, Decimal]] = None
+    reference_rate: Optional[Decimal] = None
+    for amount, result in zip(amounts, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, (httpx.HTTPError, KeyError, TypeError, ValueError)):
+                raise result
+            message = http_client.error_text(result) if isinstance(result, httpx.HTTPError) else str(result)
+            errors.append({"amountIn": float(amount), "error": message})
+            continue
+        effective_rate = result / amount
+        if previous is None:
+            marginal_rate = effective_rate
+            reference_rate = effective_rate
+        else:
+            marginal_rate = (result - previous["output"]) / (amount - previous["amount"])
+        curve.append({
+            "amountIn": float(amount),
+            "outputAmount": float(result),
+            "effectiveRate": float(effective_rate),
+            "marginalRate": float(marginal_rate),
+            "priceImpact": float(1 - effective_rate / reference_rate) if reference_rate else None,
+        })
+        previous = {"amount": amount, "output": result}
+    return {"curve": curve, "errors": errors}
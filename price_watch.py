@@ -0,0 +1,294 @@
+"""Background engine that watches KyberSwap quotes for conditional swaps.
+
+Conditions are grouped by (chain, tokenIn, tokenOut, amountIn). Every tick
+the engine fetches one quote per group, no matter how many orders share it,
+and triggers every order in the group whose minimum output is met.
+
+Each group is polled on its own schedule. The interval is the time the
+quote would need to cover the remaining distance to the nearest target at
+``TRIGGER_SIGMAS`` standard deviations of its recent volatility: groups far
+from their target are polled rarely, groups about to trigger close to
+sub-second. Upstream errors back the group off exponentially.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+import httpx
+
+import kyber_api
+import metrics
+
+logger = logging.getLogger(__name__)
+
+GroupKey = Tuple[str, str, str, int]
+TriggerCallback = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+MIN_POLL_INTERVAL = float(os.environ.get("PRICE_WATCH_MIN_INTERVAL", 0.25))
+MAX_POLL_INTERVAL = float(os.environ.get("PRICE_WATCH_MAX_INTERVAL", 30.0))
+MAX_ERROR_BACKOFF = float(os.environ.get("PRICE_WATCH_MAX_BACKOFF", 60.0))
+# Quotes kept per group for the volatility estimate
+VOLATILITY_WINDOW = 20
+# Floor on the volatility estimate (log-price per sqrt(second)), so a run of
+# identical quotes cannot stretch the interval out to the maximum right before a move
+MIN_VOLATILITY = 1e-5
+TRIGGER_SIGMAS = 3.0
+
+
+@dataclass
+class Watch:
+    id: str
+    chain: str
+    tokenIn: str
+    tokenOut: str
+    amount_in: int
+    min_price: int
+    on_trigger: TriggerCallback
+    deadline: float
+    future: asyncio.Future
+    last_price: Optional[int] = None
+    checks: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def group_key(self) -> GroupKey:
+        return (self.chain.lower(), self.tokenIn.lower(), self.tokenOut.lower(), self.amount_in)
+
+
+@dataclass
+class PollSchedule:
+    """Quote history and next poll time of one watch group."""
+    next_poll: float = 0.0
+    interval: float = 0.0
+    errors: int = 0
+    quotes: Deque[Tuple[float, float]] = field(default_factory=lambda: deque(maxlen=VOLATILITY_WINDOW))
+
+    def observe(self, at: float, price: int):
+        """Records a quote taken at monotonic time ``at``; repeated cached quotes are skipped."""
+        if price <= 0 or (self.quotes and at - self.quotes[-1][0] < 1e-3):
+            return
+        self.quotes.append((at, math.log(price)))
+
+    def volatility(self) -> Optional[float]:
+        """Realized volatility of the log quote per sqrt(second), None until three quotes were seen."""
+        if len(self.quotes) < 3:
+            return None
+        samples = list(self.quotes)
+        variance = sum((b[1] - a[1]) ** 2 for a, b in zip(samples, samples[1:]))
+        elapsed = samples[-1][0] - samples[0][0]
+        if elapsed <= 0:
+            return None
+        return max(math.sqrt(variance / elapsed), MIN_VOLATILITY)
+
+
+class PriceWatchEngine:
+    def __init__(self, poll_interval: float = 2.0, min_interval: float = MIN_POLL_INTERVAL,
+                 max_interval: float = MAX_POLL_INTERVAL, max_backoff: float = MAX_ERROR_BACKOFF):
+        """
+        Args:
+            poll_interval: Seconds between quote fetches for a group until its
+                volatility is known; also the base of the error backoff
+            min_interval: Shortest interval, used when a target is about to be met
+            max_interval: Longest interval, used when every target is far away
+            max_backoff: Longest wait after repeated upstream errors
+        """
+        self.poll_interval = poll_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self._groups: Dict[GroupKey, Dict[str, Watch]] = {}
+        self._schedules: Dict[GroupKey, PollSchedule] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        # The loop only keeps weak references to tasks; running triggers are held here
+        self._triggers: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return sum(len(watches) for watches in self._groups.values())
+
+    def register(self, chain: str, tokenIn: str, tokenOut: str, amount_in: int, min_price: int,
+                 on_trigger: TriggerCallback, timeout: float, watch_id: Optional[str] = None) -> Watch:
+        """Starts watching a condition; must be called from the running event loop.
+
+        Args:
+            chain: Chain name (e.g., "base")
+            tokenIn: Input token address
+            tokenOut: Output token address
+            amount_in: Input amount in the token's smallest units
+            min_price: Minimum ``amountOut`` (in tokenOut's smallest units) that triggers the order
+            on_trigger: Awaited with the ``/routes`` response once the condition is met;
+                its return value becomes the watch's result
+            timeout: Seconds after which the watch gives up with a None result
+            watch_id: Optional id; generated when omitted
+
+        Returns:
+            Watch: Await ``watch.future`` for the trigger result (None on timeout)
+        """
+        loop = asyncio.get_running_loop()
+        watch = Watch(
+            id=watch_id or f"watch-{next(self._ids)}",
+            chain=chain,
+            tokenIn=tokenIn,
+            tokenOut=tokenOut,
+            amount_in=int(amount_in),
+            min_price=int(min_price),
+            on_trigger=on_trigger,
+            deadline=time.monotonic() + timeout,
+            future=loop.create_future()
+        )
+        self._groups.setdefault(watch.group_key, {})[watch.id] = watch
+        # Check the new condition right away instead of waiting for the group's next poll
+        self._schedules.setdefault(watch.group_key, PollSchedule()).next_poll = time.monotonic()
+        self._ensure_running()
+        return watch
+
+    def cancel(self, watch_id: str) -> bool:
+        """Stops a watch; its future is cancelled. Returns False if it is not being watched."""
+        watch = self.get(watch_id)
+        if watch is None:
+            return False
+        self._remove(watch)
+        if not watch.future.done():
+            watch.future.cancel()
+        return True
+
+    def get(self, watch_id: str) -> Optional[Watch]:
+        for watches in self._groups.values():
+            if watch_id in watches:
+                return watches[watch_id]
+        return None
+
+    def next_poll(self, key: GroupKey) -> Optional[float]:
+        """Seconds until a group's next quote fetch, None if the group is not watched."""
+        schedule = self._schedules.get(key)
+        if schedule is None:
+            return None
+        return max(0.0, schedule.next_poll - time.monotonic())
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    def _remove(self, watch: Watch):
+        watches = self._groups.get(watch.group_key)
+        if watches is not None:
+            watches.pop(watch.id, None)
+            if not watches:
+                del self._groups[watch.group_key]
+                self._schedules.pop(watch.group_key, None)
+
+    def _due_at(self, key: GroupKey) -> float:
+        # A group needs attention at its next poll or when one of its watches expires
+        deadline = min(watch.deadline for watch in self._groups[key].values())
+        return min(self._schedules[key].next_poll, deadline)
+
+    async def _run(self):
+        while self._groups:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = [key for key in self._groups if self._due_at(key) <= now]
+            if due:
+                await asyncio.gather(*(self._poll_group(key) for key in due))
+            if not self._groups:
+                break
+            delay = min(self._due_at(key) for key in self._groups) - time.monotonic()
+            if delay <= 0:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _plan(self, schedule: PollSchedule, price: int, target: int) -> float:
+        """Seconds until the next quote for a group whose nearest target is ``target``."""
+        volatility = schedule.volatility()
+        if volatility is None or price <= 0:
+            return self.poll_interval
+        distance = math.log(target / price)
+        # Time for a random walk with this volatility to cover the distance at TRIGGER_SIGMAS
+        interval = (distance / (TRIGGER_SIGMAS * volatility)) ** 2
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    async def _poll_group(self, key: GroupKey):
+        watches = self._groups.get(key)
+        if not watches:
+            return
+
+        now = time.monotonic()
+        for watch in list(watches.values()):
+            if now >= watch.deadline:
+                logger.info("%s expired after %d checks. Price condition not met.", watch.id, watch.checks)
+                self._remove(watch)
+                if not watch.future.done():
+                    watch.future.set_result(None)
+
+        watches = self._groups.get(key)
+        if not watches:
+            return
+
+        schedule = self._schedules[key]
+        if schedule.next_poll > now:
+            return
+
+        sample = next(iter(watches.values()))
+        try:
+            # Quotes cached by other callers are reused only if they are fresh enough for this group
+            data, age = await kyber_api.get_route(
+                sample.chain, sample.tokenIn, sample.tokenOut, sample.amount_in,
+                max_age=max(schedule.interval, self.min_interval)
+            )
+            current_price = int(data['data']['routeSummary']['amountOut'])
+        except (httpx.HTTPError, KeyError, TypeError, ValueError) as error:
+            schedule.errors += 1
+            backoff = min(self.max_backoff, self.poll_interval * 2 ** schedule.errors)
+            # Jitter keeps groups that failed together from retrying in lockstep
+            schedule.interval = backoff * random.uniform(0.5, 1.0)
+            schedule.next_poll = time.monotonic() + schedule.interval
+            logger.warning("Quote for %s failed (%d in a row, retrying in %.1fs): %s",
+                           key, schedule.errors, schedule.interval, error)
+            return
+        schedule.errors = 0
+        schedule.observe(time.monotonic() - age, current_price)
+
+        for watch in list(watches.values()):
+            watch.checks += 1
+            watch.last_price = current_price
+            if current_price >= watch.min_price:
+                logger.info("%s: output %d meets target %d", watch.id, current_price, watch.min_price)
+                self._remove(watch)
+                trigger = asyncio.get_running_loop().create_task(self._trigger(watch, data))
+                self._triggers.add(trigger)
+                trigger.add_done_callback(self._triggers.discard)
+
+        watches = self._groups.get(key)
+        if watches:
+            target = min(watch.min_price for watch in watches.values())
+            schedule.interval = self._plan(schedule, current_price, target)
+            schedule.next_poll = time.monotonic() + schedule.interval
+
+    async def _trigger(self, watch: Watch, data: Dict[str, Any]):
+        try:
+            result = await watch.on_trigger(data)
+        except Exception as error:
+            if not watch.future.done():
+                watch.future.set_exception(error)
+            return
+        if not watch.future.done():
+            watch.future.set_result(result)
+
+
+engine = PriceWatchEngine()
+
+metrics.register_gauge("price_watches_in_flight", "Conditional swap watches being monitored", lambda: len(engine))
+metrics.register_gauge("price_watch_groups", "Distinct quotes polled for the watches in flight", lambda: len(engine._groups))
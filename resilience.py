@@ -0,0 +1,142 @@
+"""Tail-latency and failure handling for upstream HTTP calls.
+
+``http_client.request`` uses these pieces:
+
+- A per-host circuit breaker. After ``BREAKER_FAILURES`` consecutive
+  failures (transport errors, 5xx, 429) calls to that host fail fast with
+  ``CircuitOpenError`` for ``BREAKER_RESET_SECONDS``. A single probe request
+  then decides whether the circuit closes again.
+- Hedging for GETs. When a request is still running after the observed p95
+  latency of its endpoint, a duplicate is sent and the first answer wins.
+- Jittered exponential backoff between retries of idempotent GETs.
+"""
+import os
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+
+import metrics
+
+RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.2))
+HEDGE_QUANTILE = float(os.environ.get("HTTP_HEDGE_QUANTILE", 0.95))
+HEDGE_MIN_DELAY = float(os.environ.get("HTTP_HEDGE_MIN_DELAY", 0.05))
+BREAKER_FAILURES = int(os.environ.get("HTTP_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.environ.get("HTTP_BREAKER_RESET_SECONDS", 30))
+
+# Responses that mean the upstream is struggling, not that the request was wrong
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET_SECONDS):
+        """
+        Args:
+            host: Host the breaker guards, for error messages
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is let through
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before(self):
+        """Raises CircuitOpenError unless a request to the host may be sent now."""
+        if self.opened_at is None:
+            return
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        if remaining > 0 or self.probing:
+            raise CircuitOpenError(
+                f"{self.host} is failing ({self.failures} consecutive errors); "
+                f"not calling it for another {max(remaining, 0):.0f}s"
+            )
+        # Half-open: this request is the probe, everyone else keeps failing fast
+        self.probing = True
+
+    def record(self, ok: bool):
+        self.probing = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def abandon(self):
+        """Releases the probe slot of a request cancelled before it had an outcome."""
+        self.probing = False
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Most recent successful request durations kept
+            min_samples: Durations needed before quantiles are reported
+        """
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[Tuple[str, str], LatencyTracker] = {}
+
+
+def breaker(host: str) -> CircuitBreaker:
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker(host)
+    return _breakers[host]
+
+
+def latency(host: str, path: str) -> LatencyTracker:
+    key = (host, path)
+    if key not in _latencies:
+        _latencies[key] = LatencyTracker()
+    return _latencies[key]
+
+
+def hedge_delay(host: str, path: str) -> Optional[float]:
+    """Seconds after which a GET to this endpoint gets a duplicate, None until enough is known."""
+    observed = latency(host, path).quantile(HEDGE_QUANTILE)
+    return max(observed, HEDGE_MIN_DELAY) if observed is not None else None
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt + 1``."""
+    return random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
+
+
+def is_failure(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUSES
+
+
+metrics.register_gauge("upstream_circuits_open", "Upstream hosts whose circuit breaker is not closed",
+                       lambda: sum(breaker.state != "closed" for breaker in _breakers.values()))
@@ -1,27 +1,148 @@
-import yfinance as yf
-from colorama import Fore
-from mcp.server.fastmcp import FastMCP
 import time
-import requests
+import threading
+import httpx
 from decimal import Decimal
 import json
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+from contextlib import asynccontextmanager
+from blocking import run_blocking
+import http_client
+import metrics
+from metrics import MeteredFastMCP
+import transport
+import kyber_api
+from best_execution import best_execution
+from price_impact import amount_ladder, price_impact_curve
+import swap_jobs
+import sui_api
+from token_registry import TokenLookupError, registry as token_registry
+from http_client import AGGREGATOR_DOMAIN, LIMIT_ORDER_DOMAIN
 
 gettargetPath = '/base/api/v1/routes'
 posttargetPath = '/base/api/v1/route/build'
 
-mcp = FastMCP('yfinanceserver')
+@asynccontextmanager
+async def lifespan(server):
+    async with http_client.lifespan(server):
+        # Conditional swap jobs still watching when the server last stopped pick up where they left off
+        swap_jobs.resume(getSignerAddress())
+        yield
+
+
+mcp = MeteredFastMCP('yfinanceserver', lifespan=lifespan)
+
+# pandas, numpy and yfinance take longer to import than the rest of the server;
+# they are imported by the first price tool call instead of at startup
+price_cache = None
+price_cache_lock = threading.Lock()
 
 # HELPER FUNCTIONS
 def getSignerAddress():
     return "0x42c0682214BF0FdCac4FB29fc509FB636537396E"
 
-def getDecimals(tokenAddress):
-    return 18
+async def getDecimals(tokenAddress, targetChain):
+    # Registry hit for known tokens, one on-chain lookup the first time a token is seen
+    return await token_registry.aget_decimals(targetChain, tokenAddress)
+
+def getPriceCache():
+    """Returns the on-disk price cache, creating it on first use."""
+    global price_cache
+    with price_cache_lock:
+        if price_cache is None:
+            from price_cache import PriceCache
+            price_cache = PriceCache()
+        return price_cache
+
+def getCloseTable(tickers, start_date, end_date, interval):
+    """Returns a Date-indexed table of close prices with one column per ticker."""
+    import pandas as pd
+    from price_download import download_ohlcv_many
+
+    if isinstance(tickers, str):
+        tickers = [ticker.strip() for ticker in tickers.split(',') if ticker.strip()]
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+
+    # Tickers missing the same ranges share one multi-ticker download per range
+    frames = getPriceCache().get_many(tickers, interval, start, end, download_ohlcv_many)
+    closes = [
+        frame.set_index('Date')['Close'].rename(ticker)
+        for ticker, frame in frames.items() if not frame.empty
+    ]
+    if not closes:
+        raise ValueError("No data was fetched")
+
+    close_table = pd.concat(closes, axis=1).sort_index()
+    close_table.index.name = 'Date'
+    missing = {
+        ticker: _range_records(frame.attrs['missing_ranges'])
+        for ticker, frame in frames.items() if frame.attrs.get('missing_ranges')
+    }
+    return close_table, missing
+
+def _range_records(ranges):
+    # Same date format as the rows: just the date unless a bound falls inside a day
+    daily = all(bound.hour == bound.minute == bound.second == 0 for bounds in ranges for bound in bounds)
+    fmt = '%Y-%m-%d' if daily else '%Y-%m-%d %H:%M:%S'
+    return [[lo.strftime(fmt), hi.strftime(fmt)] for lo, hi in ranges]
+
+def _frame_records(frame, missing):
+    # FastMCP sends other objects as str(), which pandas cuts to 10 rows past 60;
+    # records go out whole as JSON
+    dates = frame['Date']
+    daily = bool((dates == dates.dt.normalize()).all())
+    frame = frame.assign(Date=dates.dt.strftime('%Y-%m-%d' if daily else '%Y-%m-%d %H:%M:%S'))
+    return {
+        "rows": frame.astype(object).where(frame.notna(), None).to_dict(orient='records'),
+        "missingRanges": missing,
+    }
+
+def _price_data(ticker, start_date, end_date, interval, max_points, downsample_method):
+    from downsample import downsample
+    from price_download import download_ohlcv
+
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+
+    # Only the ranges missing from the on-disk cache are downloaded
+    full_data = getPriceCache().get(ticker, interval, start, end, download_ohlcv)
+    if full_data.empty:
+        raise ValueError("No data was fetched")
+    # Windows that failed after all retries; the rows have a gap there
+    missing = _range_records(full_data.attrs['missing_ranges'])
+
+    if max_points:
+        full_data = downsample(full_data, max_points, downsample_method)
+        if downsample_method == 'ohlc':
+            return _frame_records(full_data[['Date', 'Open', 'High', 'Low', 'Close']], missing)
+
+    return _frame_records(full_data[['Date', 'Close']], missing)  # Return only these two columns
+
+def _batch_price_data(tickers, start_date, end_date, interval, max_points):
+    from downsample import wide_buckets
+
+    close_table, missing = getCloseTable(tickers, start_date, end_date, interval)
+    wide_data = close_table.reset_index()
+
+    if max_points:
+        wide_data = wide_buckets(wide_data, max_points)
+    return _frame_records(wide_data, missing)
+
+def _price_analytics(tickers, start_date, end_date, interval, volatility_window, ma_windows):
+    from analytics import summarize_prices
+
+    close_table, missing = getCloseTable(tickers, start_date, end_date, interval)
+    summary = summarize_prices(
+        close_table,
+        interval=interval,
+        volatility_window=int(volatility_window),
+        ma_windows=[int(window) for window in ma_windows]
+    )
+    summary["missingRanges"] = missing
+    return summary
 
 @mcp.tool()
-def get_price_data(ticker, start_date, end_date, interval="1d"):
+async def get_price_data(ticker, start_date, end_date, interval="1d", max_points=None, downsample_method="lttb"):
     """This tool returns historical price data for a given cryptocurrency pair (e.g., ETH-USD) 
     between start_date and end_date. Returns only Date and Close price columns.
     
@@ -31,75 +152,81 @@ def get_price_data(ticker, start_date, end_date, interval="1d"):
         end_date: End date in 'YYYY-MM-DD' format
         interval: Data interval (default: '1d' for daily)
                  Options: 1m, 2m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo
+        max_points: Optional maximum number of rows to return (e.g., 500). Long
+                 ranges are downsampled on the server while keeping the shape of the series
+        downsample_method: How to downsample when max_points is set (default: 'lttb')
+                 Options: 'lttb' keeps the most significant closes,
+                          'ohlc' merges rows into Open/High/Low/Close bars
     
     Returns:
-        pandas.DataFrame: A dataframe with only two columns: 
-                         - 'Date' (datetime) 
+        dict: {"rows": [...], "missingRanges": [...]}
+              - rows: one record per row with only two columns:
+                         - 'Date' ('YYYY-MM-DD', with the time for intraday intervals)
                          - 'Close' (price)
+                         plus 'Open', 'High' and 'Low' when downsample_method is 'ohlc'
+              - missingRanges: [start, end) pairs that could not be downloaded and
+                are missing from rows; empty when the series is complete
     """
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    intraday_intervals = ['1m', '2m', '5m', '15m', '30m', '1h']
-
-    if interval in intraday_intervals:
-        batch_sizes = {
-            '1m': timedelta(days=7),
-            '2m': timedelta(days=60),
-            '5m': timedelta(days=60),
-            '15m': timedelta(days=60),
-            '30m': timedelta(days=60),
-            '1h': timedelta(days=730)
-        }
+    # Downloads and pandas work run in the tool pool so other requests keep being served
+    return await run_blocking(_price_data, ticker, start_date, end_date, interval, max_points, downsample_method)
 
-        delta = batch_sizes[interval]
-        data_frames = []
-        current_start = start
-        while current_start < end:
-            current_end = min(current_start + delta, end)
-            try:
-                batch = yf.download(
-                    tickers=ticker,
-                    start=current_start,
-                    end=current_end,
-                    interval=interval,
-                    progress=False,
-                    ignore_tz=True
-                )
-                if not batch.empty:
-                    # Keep only Close price and reset index to get Date
-                    batch = batch[['Close']].reset_index()
-                    data_frames.append(batch)
-            except Exception as e:
-                print(f"Error fetching {interval} data for {current_start} to {current_end}: {str(e)}")
-
-            current_start = current_end
-            time.sleep(0.5)
-
-        if not data_frames:
-            raise ValueError("No data was fetched")
-
-        full_data = pd.concat(data_frames)
-    else:
-        full_data = yf.download(
-            tickers=ticker,
-            start=start,
-            end=end,
-            interval=interval,
-            progress=False,
-            ignore_tz=True
-        )
-        # Keep only Close price and reset index to get Date
-        full_data = full_data[['Close']].reset_index()
 
-    # Remove duplicates and sort
-    full_data = full_data[~full_data['Date'].duplicated(keep='first')]
-    full_data = full_data.sort_values('Date')
+
+@mcp.tool()
+async def get_batch_price_data(tickers, start_date, end_date, interval="1d", max_points=None):
+    """This tool returns historical close prices for several cryptocurrency pairs 
+    (e.g., ETH-USD, BTC-USD, SOL-USD) in one aligned table. Use it instead of calling
+    get_price_data once per pair when comparing pairs.
+    
+    Args:
+        tickers: List of trading pair symbols (e.g., ["ETH-USD", "BTC-USD"]),
+                 or a comma-separated string (e.g., "ETH-USD,BTC-USD")
+        start_date: Start date in 'YYYY-MM-DD' format
+        end_date: End date in 'YYYY-MM-DD' format
+        interval: Data interval (default: '1d' for daily)
+                 Options: 1m, 2m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo
+        max_points: Optional maximum number of rows to return (e.g., 500). Rows are
+                 merged into equal buckets keeping each bucket's last close
     
-    return full_data[['Date', 'Close']]  # Return only these two columns
+    Returns:
+        dict: {"rows": [...], "missingRanges": {...}}
+              - rows: one aligned record per date with a 'Date' key followed by
+                one close price per ticker (null where a ticker has no bar that date)
+              - missingRanges: ticker -> [start, end) pairs that could not be downloaded;
+                only tickers with gaps are listed
+    """
+    return await run_blocking(_batch_price_data, tickers, start_date, end_date, interval, max_points)
 
 
 @mcp.tool()
-def get_current_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChain):
+async def get_price_analytics(tickers, start_date, end_date, interval="1d", volatility_window=30, ma_windows=(7, 30)):
+    """This tool summarizes how one or more cryptocurrency pairs (e.g., ETH-USD, BTC-USD) 
+    moved between start_date and end_date. Prefer it over get_price_data for questions like
+    "how has ETH-USD moved" since it returns a small summary instead of every price.
+    
+    Args:
+        tickers: Trading pair symbol or list of symbols (e.g., "ETH-USD" or ["ETH-USD", "BTC-USD"]),
+                 or a comma-separated string (e.g., "ETH-USD,BTC-USD")
+        start_date: Start date in 'YYYY-MM-DD' format
+        end_date: End date in 'YYYY-MM-DD' format
+        interval: Data interval (default: '1d' for daily)
+                 Options: 1m, 2m, 5m, 15m, 30m, 1h, 1d, 1wk, 1mo
+        volatility_window: Number of bars in the rolling volatility window (default: 30)
+        ma_windows: Moving average lengths in bars (default: [7, 30])
+    
+    Returns:
+        dict: Per ticker start/end price, high/low, total return, annualized and rolling
+              volatility, max drawdown with peak and trough dates and latest moving
+              averages, plus the correlation of returns between tickers, and
+              missingRanges (ticker -> [start, end) pairs that could not be
+              downloaded and are left out of the summary)
+    """
+    return await run_blocking(
+        _price_analytics, tickers, start_date, end_date, interval, volatility_window, ma_windows
+    )
+
+@mcp.tool()
+async def get_current_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChain):
     """Fetches the current swap rate between two tokens on KyberSwap's aggregator.
     
     Args:
@@ -109,40 +236,103 @@ def get_current_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetCha
         targetChain (str): Chain name where the swap will occur (e.g., "ethereum", "bsc")
         
     Returns:
-            - outputAmount (str): Expected output amount in wei
+        dict:
+            - outputAmount (float): Expected output amount (in human-readable units)
+            - quoteAgeSeconds (float): How long ago the quote was fetched from KyberSwap;
+              identical requests within a couple of seconds share one quote
     """
 
-    gettargetPath = f"/{targetChain}/api/v1/routes"
-    AggregatorDomain = "https://aggregator-api.kyberswap.com"
     swapamount = Decimal(swapamount)
-    amount_in = int(swapamount * (10 ** getDecimals(tokenInaddress)))
     try:
-            # Get current price quote
-            response = requests.get(
-                f"{AggregatorDomain}{gettargetPath}",
-                params={
-                    "tokenIn": tokenInaddress,
-                    "tokenOut": tokenOutaddress,
-                    "amountIn": str(amount_in)
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
+            amount_in = int(swapamount * (10 ** await getDecimals(tokenInaddress, targetChain)))
+            # Get current price quote, shared with identical requests in flight or just made
+            data, quote_age = await kyber_api.get_route(targetChain, tokenInaddress, tokenOutaddress, amount_in)
             rate = int(data['data']['routeSummary']['amountOut'])
             # remove the zeros to make to human readable
-            rate_decimals = getDecimals(tokenOutaddress)
+            rate_decimals = await getDecimals(tokenOutaddress, targetChain)
             human_readable_rate = rate / (10 ** rate_decimals)
-            return human_readable_rate
+            return {
+                "outputAmount": human_readable_rate,
+                "quoteAgeSeconds": round(quote_age, 3)
+            }
     
-    except requests.exceptions.RequestException as error:
-        print('Error:', error.response.text if error.response else str(error))
+    except TokenLookupError as error:
+        return {"error": str(error)}
+    except httpx.HTTPError as error:
+        print('Error:', http_client.error_text(error))
+
+
+@mcp.tool()
+async def get_best_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChains):
+    """Quotes the same swap on several chains at once and ranks them by output net of gas.
+    Use this instead of calling get_current_swap_rate once per chain.
+
+    Args:
+        tokenInaddress: Input token address, or a mapping of chain to the token's address
+            (or a list of equivalent addresses) on that chain
+            Example: {"base": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
+                      "arbitrum": ["0xaf88d065e77c8cC2239327C5EDb3A432268e5831", "0xFF970A61A04b1cA14834A43f5dE4533eBDDB5CC8"]}
+        tokenOutaddress: Output token address, or a mapping like tokenInaddress
+            Example: "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+        swapamount: Amount of input token to swap (in human-readable units)
+        targetChains: Chain names, as a list or comma-separated string
+            Example: "base,arbitrum,ethereum"
+
+    Returns:
+        dict:
+            - best: The quote with the highest netOutputUsd
+            - quotes: Every successful quote, best first, with chain, tokenIn, tokenOut,
+              outputAmount, amountOutUsd, gasUsd, netOutputUsd, netOutputAmount
+              (output minus gas, in output tokens) and quoteAgeSeconds
+            - errors: Chain and token combinations that could not be quoted
+    """
+    if isinstance(targetChains, str):
+        targetChains = [chain.strip() for chain in targetChains.split(',') if chain.strip()]
+    return await best_execution(tokenInaddress, tokenOutaddress, swapamount, targetChains)
+
+
+@mcp.tool()
+async def get_price_impact_curve(tokenInaddress, tokenOutaddress, targetChain, amounts=None, minAmount=None, maxAmount=None, steps=10):
+    """Quotes a ladder of input sizes for one pair to show where price impact starts to bite.
+    Give either a list of amounts, or minAmount/maxAmount/steps for a geometric ladder.
+
+    Args:
+        tokenInaddress (str): Contract address of the input token (0x... format)
+        tokenOutaddress (str): Contract address of the output token (0x... format)
+        targetChain (str): Chain name where the swap will occur (e.g., "base")
+        amounts: Input amounts in human-readable units, as a list or comma-separated string
+            Example: "0.1,1,10,100"
+        minAmount: Smallest input amount of the ladder (used when amounts is not given)
+        maxAmount: Largest input amount of the ladder
+        steps (int): Number of sizes between minAmount and maxAmount (default: 10)
+
+    Returns:
+        dict:
+            - curve: Per size, smallest first: amountIn, outputAmount, effectiveRate
+              (output per input), marginalRate (extra output per extra input since the
+              previous size) and priceImpact (fraction of the smallest size's rate lost)
+            - errors: Sizes that could not be quoted
+        Example Error: {"error": "Give amounts or minAmount and maxAmount"}
+    """
+    try:
+        if amounts is not None:
+            if isinstance(amounts, str):
+                amounts = [amount.strip() for amount in amounts.split(',') if amount.strip()]
+        elif minAmount is not None and maxAmount is not None:
+            amounts = amount_ladder(minAmount, maxAmount, int(steps))
+        else:
+            return {"error": "Give amounts or minAmount and maxAmount"}
+        return await price_impact_curve(targetChain, tokenInaddress, tokenOutaddress, amounts)
+    except ValueError as error:
+        return {"error": str(error)}
 
 
 @mcp.tool()
-def perform_condition_Token_swap(tokenInaddress, tokenOutaddress, minPrice, swapamount, targetChain, tokenInDemical, slippage):
+async def perform_condition_Token_swap(tokenInaddress, tokenOutaddress, minPrice, swapamount, targetChain, tokenInDemical, slippage, expirySeconds=200):
     """This tool executes token swaps when the desired miniumum price is reached , 
-    only used when there is a given price target/ minimum price to be swapped
+    only used when there is a given price target/ minimum price to be swapped.
+    It returns a job id right away; the price is watched in the background.
+    Use get_conditional_swap_status with the job id to follow the job.
     
     Args:
         tokenInaddress: Contract address of the token to swap from (use 0xEee...EEeE for native ETH)
@@ -163,90 +353,82 @@ def perform_condition_Token_swap(tokenInaddress, tokenOutaddress, minPrice, swap
         slippage: Slippage tolerance in basis points (100 = 1%)
         Example: 100
 
+        expirySeconds: Seconds to keep watching before the job expires (default: 200)
+
     Returns:
-        dict: Swap transaction details when successful, None if conditions not met
+        dict: The submitted job
         Example Response: {
-            "routerAddress": "0x...",
-            "data": "0x...",
-            "amountIn": "1000000"
+            "job_id": "3f2a9c1e0b7d",
+            "status": "watching",
+            "expires_at": 1718000000.0
         }
-        Example Error: None
     """
     minPrice = int(minPrice)
     swapamount = Decimal(swapamount)
     tokenInDemical= int(tokenInDemical)
     slippage = int(slippage)
-
-    AggregatorDomain = "https://aggregator-api.kyberswap.com"
-    gettargetPath = f"/{targetChain}/api/v1/routes"
-    posttargetPath = f"/{targetChain}/api/v1/route/build"
-    
-    # Swap parameters
-    POLL_INTERVAL = 2  
-    max_attempts = 100 
     
     # Calculate amount in smallest units
     amount_in = int(swapamount * (10 ** tokenInDemical))
-    
-    # Monitoring loop
-    for attempt in range(1, max_attempts + 1):
-        try:
-            # Get current price quote
-            response = requests.get(
-                f"{AggregatorDomain}{gettargetPath}",
-                params={
-                    "tokenIn": tokenInaddress,
-                    "tokenOut": tokenOutaddress,
-                    "amountIn": str(amount_in)
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Check response structure
-            if not data.get('data', {}).get('routeSummary'):
-                print(f"[Attempt {attempt}] Unexpected response format")
-                continue
-                
-            current_price = int(data['data']['routeSummary']['amountOut'])
-            print(f"[Attempt {attempt}] Current output: {current_price}, Target: {minPrice}")
-            
-            # Check if price meets our condition
-            if current_price >= minPrice:
-                print("Price condition met! Building swap transaction...")
-                
-                # Build swap transaction
-                swap_response = requests.post(
-                    f"{AggregatorDomain}{posttargetPath}",
-                    json={
-                        "routeSummary": data['data']['routeSummary'],
-                        "sender": getSignerAddress(),
-                        "recipient": getSignerAddress(),
-                        "slippageTolerance": slippage
-                    },
-                    timeout=10
-                )
-                swap_response.raise_for_status()
-                swap_data = swap_response.json()
-                
-                print("Swap transaction built successfully!")
-                return swap_data['data']
-                
-        except requests.exceptions.RequestException as error:
-            print(f"Attempt {attempt} failed:", str(error))
-            if hasattr(error, 'response') and error.response:
-                print("Error details:", error.response.text)
-        
-        time.sleep(POLL_INTERVAL)
-    
-    print(f"Failed after {max_attempts} attempts. Price condition not met.")
-    return None
+
+    # The job is stored in SQLite and watched by the shared price engine, so it survives restarts
+    job = swap_jobs.submit(
+        targetChain, tokenInaddress, tokenOutaddress, amount_in, minPrice, slippage,
+        expires_in=float(expirySeconds), sender=getSignerAddress()
+    )
+    return {"job_id": job['id'], "status": job['status'], "expires_at": job['expires_at']}
+
+
+@mcp.tool()
+async def get_conditional_swap_status(job_id):
+    """Returns the state of a conditional swap job created by perform_condition_Token_swap.
+
+    Args:
+        job_id: Id returned when the job was submitted
+
+    Returns:
+        dict: The job, with "status" one of "watching", "completed", "failed",
+              "expired" or "cancelled"; "result" holds the swap transaction
+              details once the job is completed, "error" the failure reason
+        Example Error: {"error": "Unknown job id: 3f2a9c1e0b7d"}
+    """
+    job = swap_jobs.get(job_id)
+    if job is None:
+        return {"error": f"Unknown job id: {job_id}"}
+    return job
+
+
+@mcp.tool()
+async def list_conditional_swaps(status=None, limit=20):
+    """Lists the most recent conditional swap jobs.
+
+    Args:
+        status: Optional status filter (e.g., "watching" or "completed")
+        limit: Maximum number of jobs to return (default: 20)
+
+    Returns:
+        list: Jobs, newest first
+    """
+    return swap_jobs.list_jobs(status, int(limit))
+
+
+@mcp.tool()
+async def cancel_conditional_swap(job_id):
+    """Stops watching the price for a conditional swap job.
+
+    Args:
+        job_id: Id returned when the job was submitted
+
+    Returns:
+        dict: {"job_id": ..., "cancelled": True}; "cancelled" is False if the
+              job is unknown or already finished
+    """
+    return {"job_id": job_id, "cancelled": swap_jobs.cancel(job_id)}
 
 
 
 @mcp.tool()
-def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain, slippage):
+async def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain, slippage):
     """This tool executes a token swap without price targets or minimum price.
     
     Args:
@@ -277,45 +459,45 @@ def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain,
         ... )
     """
 
-    AggregatorDomain = "https://aggregator-api.kyberswap.com"
     gettargetPath = f"/{targetChain}/api/v1/routes"
     posttargetPath = f"/{targetChain}/api/v1/route/build"
-    amount_in = int(Decimal(swapamount) * (10 ** getDecimals(tokenInaddress)))
+    try:
+        amount_in = int(Decimal(swapamount) * (10 ** await getDecimals(tokenInaddress, targetChain)))
+    except TokenLookupError as error:
+        return {"error": str(error)}
 
     try:
-        response = requests.get(
-                f"{AggregatorDomain}{gettargetPath}",
+        response = await http_client.get(
+                f"{AGGREGATOR_DOMAIN}{gettargetPath}",
                 params={
                     "tokenIn": tokenInaddress,
                     "tokenOut": tokenOutaddress,
                     "amountIn": str(amount_in)
-                },
-                timeout=10
+                }
             )
         response.raise_for_status()
         data = response.json()
 
-        swap_response = requests.post(
-                    f"{AggregatorDomain}{posttargetPath}",
+        swap_response = await http_client.post(
+                    f"{AGGREGATOR_DOMAIN}{posttargetPath}",
                     json={
                         "routeSummary": data['data']['routeSummary'],
                         "sender": getSignerAddress(),
                         "recipient": getSignerAddress(),
                         "slippageTolerance": slippage
-                    },
-                    timeout=10
+                    }
                 )
         swap_response.raise_for_status()
         swap_data = swap_response.json()
         print("Swap transaction built successfully!")
         return swap_data['data']
 
-    except requests.exceptions.RequestException as error:
+    except httpx.HTTPError as error:
             return str(error)
 
 
 @mcp.tool()
-def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, ChainID):
+async def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, ChainID):
     """Creates a limit order.
     
     Args:
@@ -352,15 +534,18 @@ def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, Chai
 
     AmountIn = Decimal(AmountIn)
     AmountOut = Decimal(AmountOut)
-    makingAmount = str(int(AmountIn * (10 ** 18)))
-    takingAmount = str(int(AmountOut * (10 ** 6)))
+    try:
+        makingAmount = str(int(AmountIn * (10 ** await getDecimals(tokenInaddress, ChainID))))
+        takingAmount = str(int(AmountOut * (10 ** await getDecimals(tokenOutaddress, ChainID))))
+    except TokenLookupError as error:
+        return {"error": str(error)}
 
     try:
         # First request to get signature data
-        response = requests.post(
-            'https://limit-order.kyberswap.com/write/api/v1/orders/sign-message',
+        response = await http_client.post(
+            f"{LIMIT_ORDER_DOMAIN}/write/api/v1/orders/sign-message",
             headers={'Content-Type': 'application/json'},
-            data=json.dumps({
+            content=json.dumps({
                 "chainId": ChainID,
                 "makerAsset": tokenInaddress,
                 "takerAsset": tokenOutaddress,
@@ -401,9 +586,81 @@ def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, Chai
         """
     
 
-    except requests.exceptions.RequestException as error:
-            print('Error:', error.response.text if error.response else str(error))
+    except httpx.HTTPError as error:
+            print('Error:', http_client.error_text(error))
+
+
+def _coin_type_list(coinTypes):
+    if isinstance(coinTypes, str):
+        return [coin_type.strip() for coin_type in coinTypes.split(',') if coin_type.strip()]
+    return list(coinTypes)
+
+
+@mcp.tool()
+async def get_sui_coin_metadata(coinTypes):
+    """Returns the metadata (decimals, symbol, name, description, icon) of one or more Sui coins.
+    All coins are looked up in one request, and metadata seen before is answered from cache.
+
+    Args:
+        coinTypes: Sui coin type or list of coin types, or a comma-separated string
+            Example: ["0x2::sui::SUI", "0xdba34672e30cb065b1f93e3ab55318768fd6fef66c15942c9f7cb846e2f900e7::usdc::USDC"]
+
+    Returns:
+        dict:
+            - coins: Coin type -> {decimals, symbol, name, description, iconUrl, id}
+            - errors: Coin types that could not be looked up, with the reason
+
+    Raises:
+        Exception: If the Sui fullnode request fails; raised rather than returned so
+            clients that keep metadata for good do not keep the failure too
+    """
+    coins, errors = await sui_api.get_coin_metadata(_coin_type_list(coinTypes))
+    return {"coins": coins, "errors": errors}
+
+
+@mcp.tool()
+async def get_sui_balances(owner, coinTypes=None):
+    """Returns the Sui coin balances of an address, in human-readable units.
+
+    Args:
+        owner: Sui address (0x... format)
+        coinTypes: Optional coin type or list of coin types to check, or a comma-separated
+            string (e.g., "0x2::sui::SUI"); every coin the address holds when omitted
+
+    Returns:
+        dict:
+            - balances: Coin type -> {coinType, symbol, decimals, totalBalance (smallest units),
+              amount (human-readable), coinObjectCount}
+            - errors: Coin types whose balance or metadata could not be looked up
+    """
+    try:
+        balances, errors = await sui_api.get_balances_with_metadata(
+            owner, _coin_type_list(coinTypes) if coinTypes is not None else None
+        )
+    except Exception as error:
+        return {"error": str(error)}
+    return {"balances": balances, "errors": errors}
+
+
+@mcp.tool()
+async def get_server_metrics():
+    """Returns this server's own performance metrics: per-tool call counts, errors and
+    latency, per-upstream-endpoint request counts and latency, cache hit ratios and
+    the number of conditional swap watches in flight.
+
+    Returns:
+        dict: {"tools": {...}, "upstream": {...}, "caches": {...}, "gauges": {...}};
+              latencies are in milliseconds (p50/p99 estimated from histograms)
+    """
+    return metrics.snapshot()
+
+
+@mcp.resource("metrics://snapshot")
+def metrics_snapshot() -> str:
+    """Performance metrics of this server as JSON (same content as get_server_metrics)."""
+    return json.dumps(metrics.snapshot())
 
 
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    # stdio by default; --transport sse serves many clients from one process
+    transport.run(mcp)
\ No newline at end of file
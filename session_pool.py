@@ -0,0 +1,267 @@
+"""Client-side pool of warm MCP sessions shared by agent invocations.
+
+Spawning ``uv run server.py`` for every question pays interpreter startup,
+imports and ``session.initialize()`` each time. A ``SessionPool`` keeps up to
+``size`` initialized sessions open, either stdio children or connections to
+a long-running HTTP server (``server.py --transport sse``), and lends one out
+per tool call. Sessions idle for a while are pinged before they are handed
+out, and dead or worn-out ones are closed and replaced, so a batch of 100
+questions runs against ``size`` servers instead of 100.
+
+    async with SessionPool(StdioServerParameters(command="uv", args=["run", "server.py"])) as pool:
+        tools = await load_mcp_tools(pool)
+
+The pool answers ``list_tools`` and ``call_tool`` like a ``ClientSession``,
+so tool adapters can be built on it directly. ``BlockingSessionPool`` offers
+the same for synchronous agents.
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from mcp import ClientSession, McpError, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", 4))
+# Seconds a session may sit idle before it is pinged on checkout
+CHECK_AFTER = float(os.environ.get("MCP_POOL_CHECK_AFTER", 30))
+PING_TIMEOUT = float(os.environ.get("MCP_POOL_PING_TIMEOUT", 5))
+# Calls after which a session is replaced; 0 keeps it as long as it is healthy
+MAX_USES = int(os.environ.get("MCP_POOL_MAX_USES", 0))
+CLOSE_TIMEOUT = 5.0
+
+ServerTarget = Union[StdioServerParameters, str]
+
+
+def _transport(server: ServerTarget):
+    # A URL means a running HTTP server; anything else is a command to spawn
+    if isinstance(server, str):
+        if server.rstrip("/").endswith("/sse"):
+            return sse_client(server)
+        try:
+            from mcp.client.streamable_http import streamablehttp_client
+        except ImportError:
+            raise ValueError(f"{server} is not an SSE endpoint and this mcp version has no streamable HTTP client")
+        return streamablehttp_client(server)
+    return stdio_client(server)
+
+
+class _PooledSession:
+    """One open session, held by its own task.
+
+    The stdio and SSE transports are anyio task groups, which must be exited
+    by the task that entered them, so opening and closing both happen in
+    ``_hold`` rather than in whichever caller triggered them.
+    """
+
+    def __init__(self, server: ServerTarget):
+        self.server = server
+        self.session: Optional[ClientSession] = None
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self.suspect = False
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self):
+        self._task = asyncio.create_task(self._hold())
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _hold(self):
+        try:
+            async with _transport(self.server) as streams:
+                read, write = streams[0], streams[1]
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as error:
+            self._error = error
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+        except Exception:
+            return False
+        self.suspect = False
+        return True
+
+    async def close(self):
+        self._closing.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+
+
+class SessionPool:
+    def __init__(self, server: ServerTarget, size: int = POOL_SIZE, check_after: float = CHECK_AFTER,
+                 ping_timeout: float = PING_TIMEOUT, max_uses: int = MAX_USES):
+        """
+        Args:
+            server: Server command to spawn over stdio, or the URL of a running HTTP server
+                (e.g., "http://127.0.0.1:8000/sse")
+            size: Most sessions open at once, which is also the most concurrent checkouts
+            check_after: Seconds a session may sit idle before it is pinged on checkout
+            ping_timeout: Seconds a ping may take before the session counts as dead
+            max_uses: Checkouts after which a session is replaced; 0 never replaces a healthy one
+        """
+        self.server = server
+        self.size = size
+        self.check_after = check_after
+        self.ping_timeout = ping_timeout
+        self.max_uses = max_uses
+        self.opened = 0
+        self.recycled = 0
+        self._idle: List[_PooledSession] = []
+        self._busy: List[_PooledSession] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def __aenter__(self) -> "SessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self, warm: Optional[int] = None):
+        """Opens ``warm`` sessions (default: the pool size) up front so the first calls don't wait."""
+        count = self.size if warm is None else min(warm, self.size)
+        members = await asyncio.gather(*(self._open() for _ in range(count - len(self._idle))))
+        self._idle.extend(members)
+
+    async def _open(self) -> _PooledSession:
+        member = _PooledSession(self.server)
+        await member.open()
+        self.opened += 1
+        return member
+
+    async def _recycle(self, member: _PooledSession):
+        self.recycled += 1
+        await member.close()
+
+    async def _healthy(self, member: _PooledSession) -> bool:
+        if not member.alive:
+            return False
+        if member.suspect or time.monotonic() - member.last_used >= self.check_after:
+            return await member.ping(self.ping_timeout)
+        return True
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        """Checks out a healthy session for the duration of the block."""
+        async with self._slots:
+            member = None
+            while self._idle:
+                candidate = self._idle.pop()
+                if await self._healthy(candidate):
+                    member = candidate
+                    break
+                await self._recycle(candidate)
+            if member is None:
+                member = await self._open()
+
+            self._busy.append(member)
+            try:
+                yield member.session
+            except McpError:
+                # The server answered with an error, so the session itself is fine
+                raise
+            except BaseException:
+                member.suspect = True
+                raise
+            finally:
+                self._busy.remove(member)
+                member.uses += 1
+                member.last_used = time.monotonic()
+                if not member.alive or (self.max_uses and member.uses >= self.max_uses):
+                    await self._recycle(member)
+                else:
+                    self._idle.append(member)
+
+    async def list_tools(self):
+        async with self.session() as session:
+            return await session.list_tools()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        async with self.session() as session:
+            return await session.call_tool(name, arguments)
+
+    async def close(self):
+        members, self._idle = self._idle + self._busy, []
+        await asyncio.gather(*(member.close() for member in members))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "busy": len(self._busy),
+            "opened": self.opened,
+            "recycled": self.recycled,
+        }
+
+
+class BlockingSessionPool:
+    """``SessionPool`` for synchronous callers, run on its own event loop thread.
+
+    Calls may come from any number of threads at once; each borrows a pooled
+    session for the length of the call.
+    """
+
+    def __init__(self, server: ServerTarget, **options):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-session-pool", daemon=True)
+        self._thread.start()
+        self.pool: SessionPool = self._run(self._create(server, options))
+
+    async def _create(self, server: ServerTarget, options: Dict[str, Any]) -> SessionPool:
+        # The pool's semaphore must be created on the loop that will use it
+        return SessionPool(server, **options)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def __enter__(self) -> "BlockingSessionPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self, warm: Optional[int] = None):
+        self._run(self.pool.start(warm))
+
+    def list_tools(self):
+        return self._run(self.pool.list_tools())
+
+    def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        return self._run(self.pool.call_tool(name, arguments))
+
+    def stats(self) -> Dict[str, int]:
+        return self.pool.stats()
+
+    def close(self):
+        self._run(self.pool.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
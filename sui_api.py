@@ -0,0 +1,133 @@
+"""Sui fullnode calls shared by the Sui tools.
+
+Coin metadata (decimals, symbol, name) is fixed once a coin is published,
+so it is cached for the life of the process. Balances change with every
+transaction and are only reused for ``SUI_BALANCE_CACHE_TTL`` seconds.
+Whatever is not cached goes out as one batched JSON-RPC request, so looking
+up N coins costs one round trip.
+"""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from Hop import AsyncSuiRpcClient
+from ttl_cache import TTLCache
+
+SUI_NETWORK = os.environ.get("SUI_NETWORK", "mainnet")
+SUI_RPC_URL = os.environ.get("SUI_RPC_URL")
+SUI_BALANCE_CACHE_TTL = float(os.environ.get("SUI_BALANCE_CACHE_TTL", 5.0))
+
+client = AsyncSuiRpcClient(network=SUI_NETWORK, custom_endpoint=SUI_RPC_URL)
+
+metadata_cache = TTLCache(ttl=None, max_entries=4096, name="sui_metadata")
+balance_cache = TTLCache(ttl=SUI_BALANCE_CACHE_TTL, max_entries=4096, name="sui_balances")
+
+Results = Tuple[Dict[str, Any], Dict[str, str]]
+
+
+def _rpc_error(response: Dict[str, Any]) -> str:
+    error = response.get("error") or {}
+    return error.get("message", str(error))
+
+
+async def _cached_batch(cache: TTLCache, keys: List[Any], method: str, params: List[list]) -> Results:
+    # Serves what the cache has and fetches every miss in one batch request
+    found: Dict[Any, Any] = {}
+    errors: Dict[Any, str] = {}
+    missing = []
+    for key, key_params in zip(keys, params):
+        cached = cache.get(key)
+        if cached is not None:
+            found[key] = cached[0]
+        else:
+            missing.append((key, key_params))
+    metrics.record_cache(cache.name, "hit", len(found))
+    metrics.record_cache(cache.name, "miss", len(missing))
+
+    if missing:
+        responses = await client.batch_call([(method, key_params) for _, key_params in missing])
+        for (key, _), response in zip(missing, responses):
+            if "error" in response:
+                errors[key] = _rpc_error(response)
+            elif response.get("result") is None:
+                errors[key] = "not found"
+            else:
+                found[key] = cache.set(key, response["result"])[0]
+    return found, errors
+
+
+async def get_coin_metadata(coin_types: List[str]) -> Results:
+    """Returns ``suix_getCoinMetadata`` results for each coin type.
+
+    Returns:
+        tuple: (coin type -> metadata, coin type -> error message)
+
+    Raises:
+        Exception: If the batch request itself fails
+    """
+    coin_types = list(dict.fromkeys(coin_types))
+    return await _cached_batch(metadata_cache, coin_types, "suix_getCoinMetadata",
+                               [[coin_type] for coin_type in coin_types])
+
+
+async def get_balances(owner: str, coin_types: Optional[List[str]] = None) -> Results:
+    """Returns ``suix_getBalance`` results of ``owner`` for each coin type, or every coin it holds.
+
+    Returns:
+        tuple: (coin type -> balance, coin type -> error message)
+
+    Raises:
+        Exception: If the request itself fails
+    """
+    if coin_types is None:
+        async def fetch_all():
+            response = await client.call_rpc("suix_getAllBalances", [owner])
+            if "error" in response:
+                raise Exception(f"suix_getAllBalances failed: {_rpc_error(response)}")
+            return response["result"]
+
+        balances, _ = await balance_cache.get_or_fetch((owner, None), fetch_all)
+        return {balance["coinType"]: balance for balance in balances}, {}
+
+    coin_types = list(dict.fromkeys(coin_types))
+    found, errors = await _cached_batch(balance_cache, [(owner, coin_type) for coin_type in coin_types],
+                                        "suix_getBalance", [[owner, coin_type] for coin_type in coin_types])
+    return ({coin_type: balance for (_, coin_type), balance in found.items()},
+            {coin_type: error for (_, coin_type), error in errors.items()})
+
+
+async def get_balances_with_metadata(owner: str, coin_types: Optional[List[str]] = None) -> Results:
+    """Balances of ``owner`` with amounts converted using each coin's decimals.
+
+    When the coin types are given, the metadata batch goes out alongside the
+    balance batch; after the first lookup it comes from the metadata cache.
+
+    Returns:
+        tuple: (coin type -> {coinType, symbol, decimals, totalBalance, amount, coinObjectCount},
+                coin type -> error message)
+    """
+    if coin_types is None:
+        balances, errors = await get_balances(owner)
+        metadata, metadata_errors = await get_coin_metadata(list(balances))
+    else:
+        (balances, errors), (metadata, metadata_errors) = await asyncio.gather(
+            get_balances(owner, coin_types), get_coin_metadata(coin_types)
+        )
+
+    results = {}
+    for coin_type, balance in balances.items():
+        coin = metadata.get(coin_type)
+        total = int(balance["totalBalance"])
+        results[coin_type] = {
+            "coinType": coin_type,
+            "symbol": coin["symbol"] if coin else None,
+            "decimals": coin["decimals"] if coin else None,
+            "totalBalance": str(total),
+            # Without metadata only the raw totalBalance can be reported
+            "amount": total / 10 ** coin["decimals"] if coin else None,
+            "coinObjectCount": balance.get("coinObjectCount"),
+        }
+        if coin is None:
+            errors.setdefault(coin_type, f"metadata unavailable: {metadata_errors.get(coin_type, 'not found')}")
+    return results, errors
@@ -0,0 +1,211 @@
+"""Non-blocking conditional swap jobs.
+
+A job is persisted in the SQLite job store and handed to the shared price
+watch engine; the tool call that created it returns the job id right away.
+When the price condition is met the swap transaction is built and stored as
+the job's result. Jobs still watching when the server stops are picked up
+again by ``resume`` on the next start.
+
+When several processes share the store, each job is watched by the one
+process holding its lease (see job_store). The owner renews its leases on a
+heartbeat, stops watching jobs that were cancelled from another process, and
+re-checks the stored job right before building its swap.
+"""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+import http_client
+import kyber_api
+import price_watch
+from blocking import run_blocking
+from job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+store = JobStore()
+
+# Identifies this process as the owner of the jobs it watches
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 30))
+
+# Jobs this process is watching or still recording the outcome of, the signer
+# they build for, and the task renewing their leases
+_watched: Set[str] = set()
+_sender: Optional[str] = None
+_heartbeat_task: Optional[asyncio.Task] = None
+# Outcomes being written to the store; the loop only keeps weak references to tasks
+_finishing: Set[asyncio.Task] = set()
+
+
+class JobReleased(Exception):
+    """The job was cancelled or taken over by another process before its swap was built."""
+
+
+def _watch_fields(job: Dict[str, Any]) -> Dict[str, Any]:
+    # Progress lives in the engine while a job is watched; it is written to the store when the job ends
+    watch = price_watch.engine.get(job['id'])
+    if watch is not None:
+        job = {**job, 'checks': job['checks'] + watch.checks, 'last_price': watch.last_price}
+    return job
+
+
+def _progress(job_id: str, watch: price_watch.Watch) -> Dict[str, Any]:
+    return {'checks': (store.get(job_id) or {}).get('checks', 0) + watch.checks, 'last_price': watch.last_price}
+
+
+def _outcome(job_id: str, future: asyncio.Future) -> Optional[Dict[str, Any]]:
+    # Fields recording how the watch ended; None when the job is no longer this process's to record
+    if future.cancelled():
+        return {'status': 'cancelled'}
+    error = future.exception()
+    if isinstance(error, JobReleased):
+        logger.info("Job %s: %s", job_id, error)
+        return None
+    if error is not None:
+        message = http_client.error_text(error) if isinstance(error, httpx.HTTPError) else str(error)
+        return {'status': 'failed', 'error': message}
+    if future.result() is None:
+        return {'status': 'expired'}
+    return {'status': 'completed', 'result': future.result()}
+
+
+def _record(job_id: str, watch: price_watch.Watch, outcome: Dict[str, Any]):
+    # Only the owner records the outcome; a job cancelled or taken over elsewhere is left as it is
+    store.update(job_id, only_if_active=True, owner=OWNER, **outcome, **_progress(job_id, watch))
+
+
+async def _finish(job_id: str, watch: price_watch.Watch, outcome: Dict[str, Any]):
+    # The job stays in _watched until its outcome is stored, so the heartbeat keeps its
+    # lease and no other process picks it up again in the meantime
+    delay = 0.1
+    try:
+        while True:
+            try:
+                await run_blocking(_record, job_id, watch, outcome)
+                return
+            except sqlite3.Error as error:
+                # Another process holding the database lock
+                logger.warning("Recording job %s as %s failed, retrying in %.1fs: %s",
+                               job_id, outcome['status'], delay, error)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LEASE_SECONDS / 3)
+    finally:
+        _watched.discard(job_id)
+
+
+def _on_done(job_id: str, watch: price_watch.Watch, future: asyncio.Future):
+    outcome = _outcome(job_id, future)
+    if outcome is None:
+        _watched.discard(job_id)
+        return
+    # Done callbacks run on the event loop, so the store is written from the tool pool
+    task = asyncio.get_running_loop().create_task(_finish(job_id, watch, outcome))
+    _finishing.add(task)
+    task.add_done_callback(_finishing.discard)
+
+
+async def _heartbeat():
+    # Runs while this process watches jobs
+    while _watched:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        try:
+            owned = set(store.renew(OWNER, LEASE_SECONDS))
+        except sqlite3.Error as error:
+            # Another process holding the database lock; retry on the next beat, well within the lease
+            logger.warning("Renewing job leases failed: %s", error)
+            continue
+        for job_id in _watched - owned:
+            # Cancelled from another process, or taken over after a missed renewal
+            price_watch.engine.cancel(job_id)
+        if _sender is not None:
+            # Adopt jobs whose owner stopped renewing, e.g. because it exited
+            resume(_sender)
+
+
+def _ensure_heartbeat():
+    global _heartbeat_task
+    if _heartbeat_task is None or _heartbeat_task.done():
+        _heartbeat_task = asyncio.get_running_loop().create_task(_heartbeat())
+
+
+def _watch(job: Dict[str, Any], sender: str):
+    async def build_swap(data):
+        # The stored job is the source of truth: another process may have cancelled it meanwhile
+        if not store.update(job['id'], only_if_active=True, owner=OWNER, lease_until=time.time() + LEASE_SECONDS):
+            raise JobReleased("cancelled or taken over by another process; swap not built")
+        swap_data = await kyber_api.build_route(
+            job['chain'], data['data']['routeSummary'], sender, sender, job['slippage']
+        )
+        logger.info("Job %s: swap transaction built", job['id'])
+        return swap_data['data']
+
+    watch = price_watch.engine.register(
+        job['chain'], job['token_in'], job['token_out'], job['amount_in'], job['min_price'],
+        build_swap, timeout=max(0.0, job['expires_at'] - time.time()), watch_id=job['id']
+    )
+    watch.future.add_done_callback(lambda future: _on_done(job['id'], watch, future))
+    _watched.add(job['id'])
+    _ensure_heartbeat()
+
+
+def submit(chain: str, token_in: str, token_out: str, amount_in: int, min_price: int,
+           slippage: int, expires_in: float, sender: str) -> Dict[str, Any]:
+    """Persists a conditional swap job, leased to this process, and starts watching it; returns the job."""
+    job = store.create(chain, token_in, token_out, amount_in, min_price, slippage, expires_in,
+                       owner=OWNER, lease=LEASE_SECONDS)
+    _watch(job, sender)
+    return job
+
+
+def resume(sender: str) -> int:
+    """Starts watching every job left 'watching' by a previous run; returns how many resumed.
+
+    Jobs another live process holds a lease on are left to that process.
+    """
+    global _sender
+    _sender = sender
+    resumed = 0
+    for job in store.active():
+        if job['id'] in _watched or price_watch.engine.get(job['id']) is not None:
+            continue
+        if job['expires_at'] <= time.time():
+            store.update(job['id'], only_if_active=True, status='expired')
+            continue
+        if not store.claim(job['id'], OWNER, LEASE_SECONDS):
+            continue
+        _watch(store.get(job['id']), sender)
+        resumed += 1
+    if resumed:
+        logger.info("Resumed %d conditional swap jobs", resumed)
+    return resumed
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    job = store.get(job_id)
+    return _watch_fields(job) if job is not None else None
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    return [_watch_fields(job) for job in store.list(status, limit)]
+
+
+def cancel(job_id: str) -> bool:
+    """Cancels a watching job. Returns False if it does not exist or already ended.
+
+    A job watched by another process is cancelled in the store; its owner
+    stops watching on its next heartbeat and never builds the swap.
+    """
+    watch = price_watch.engine.get(job_id)
+    progress = _progress(job_id, watch) if watch is not None else {}
+    if not store.update(job_id, only_if_active=True, status='cancelled', **progress):
+        return False
+    price_watch.engine.cancel(job_id)
+    return True
@@ -1,57 +1,55 @@
-import mcp
 import time
-import requests
+import asyncio
+import httpx
 from decimal import Decimal
 import json
+import http_client
+import metrics
+from metrics import MeteredFastMCP
+import transport
+import kyber_api
+from best_execution import best_execution
+from price_impact import amount_ladder, price_impact_curve
+import price_watch
+from token_registry import TokenLookupError, registry as token_registry
+from http_client import AGGREGATOR_DOMAIN, LIMIT_ORDER_DOMAIN
 
-AggregatorDomain = "https://aggregator-api.kyberswap.com"
+mcp = MeteredFastMCP('swapserver', lifespan=http_client.lifespan)
 
 #### Helper functions
 def getSignerAddress():
     return "0x42c0682214BF0FdCac4FB29fc509FB636537396E"
 
-def getDecimals(tokenAddress):
+async def getDecimals(tokenAddress, targetChain):
     # number of decimcals for the given ERC20 token and native token
-    pass
+    return await token_registry.aget_decimals(targetChain, tokenAddress)
 
-def get_swap_quote(tokenInaddress,tokenOutaddress, amount_in, targetChain):
-    gettargetPath = f"/{targetChain}/api/v1/routes"
-    amount_in = int(amount_in * (10 ** getDecimals(tokenInaddress)))
+async def get_swap_quote(tokenInaddress,tokenOutaddress, amount_in, targetChain):
     try:
-            # Get current price quote
-            response = requests.get(
-                f"{AggregatorDomain}{gettargetPath}",
-                params={
-                    "tokenIn": tokenInaddress,
-                    "tokenOut": tokenOutaddress,
-                    "amountIn": str(amount_in)
-                },
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data
-    except requests.exceptions.RequestException as error:
+            amount_in = int(Decimal(amount_in) * (10 ** await getDecimals(tokenInaddress, targetChain)))
+            # Get current price quote, shared with identical requests in flight or just made
+            data, quote_age = await kyber_api.get_route(targetChain, tokenInaddress, tokenOutaddress, amount_in)
+            return {**data, "quoteAgeSeconds": round(quote_age, 3)}
+    except (httpx.HTTPError, TokenLookupError) as error:
         return None
     
-def post_swap_quote(data, slippage, targetChain):
+async def post_swap_quote(data, slippage, targetChain):
     posttargetPath = f"/{targetChain}/api/v1/route/build"
     try:
-        swap_response = requests.post(
-                        f"{AggregatorDomain}{posttargetPath}",
+        swap_response = await http_client.post(
+                        f"{AGGREGATOR_DOMAIN}{posttargetPath}",
                         json={
                             "routeSummary": data['data']['routeSummary'],
                             "sender": getSignerAddress(),
                             "recipient": getSignerAddress(),
                             "slippageTolerance": slippage
-                        },
-                        timeout=10
+                        }
                     )
         swap_response.raise_for_status()
         swap_data = swap_response.json()
         print("Swap transaction built successfully!")
         return swap_data
-    except requests.exceptions.RequestException as error:
+    except httpx.HTTPError as error:
         return None
 
 def excute_transcation(data):
@@ -61,16 +59,84 @@ def excute_transcation(data):
 
 ### TOOLS
 @mcp.tool()
-def get_current_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChain):
+async def get_current_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChain):
 
-    quote_data = get_swap_quote(tokenInaddress, tokenOutaddress, swapamount, targetChain)
+    quote_data = await get_swap_quote(tokenInaddress, tokenOutaddress, swapamount, targetChain)
     if not quote_data:
         return {"error": "Failed to get swap quote"}
-    return 
+    return {
+        "outputAmount": quote_data['data']['routeSummary']['amountOut'],
+        "quoteAgeSeconds": quote_data['quoteAgeSeconds']
+    }
+
+
+@mcp.tool()
+async def get_best_swap_rate(tokenInaddress, tokenOutaddress, swapamount, targetChains):
+    """Quotes the same swap on several chains at once and ranks them by output net of gas.
+    Use this instead of calling get_current_swap_rate once per chain.
+
+    Args:
+        tokenInaddress: Input token address, or a mapping of chain to the token's address
+            (or a list of equivalent addresses) on that chain
+            Example: {"base": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913",
+                      "arbitrum": ["0xaf88d065e77c8cC2239327C5EDb3A432268e5831", "0xFF970A61A04b1cA14834A43f5dE4533eBDDB5CC8"]}
+        tokenOutaddress: Output token address, or a mapping like tokenInaddress
+            Example: "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+        swapamount: Amount of input token to swap (in human-readable units)
+        targetChains: Chain names, as a list or comma-separated string
+            Example: "base,arbitrum,ethereum"
+
+    Returns:
+        dict:
+            - best: The quote with the highest netOutputUsd
+            - quotes: Every successful quote, best first, with chain, tokenIn, tokenOut,
+              outputAmount, amountOutUsd, gasUsd, netOutputUsd, netOutputAmount
+              (output minus gas, in output tokens) and quoteAgeSeconds
+            - errors: Chain and token combinations that could not be quoted
+    """
+    if isinstance(targetChains, str):
+        targetChains = [chain.strip() for chain in targetChains.split(',') if chain.strip()]
+    return await best_execution(tokenInaddress, tokenOutaddress, swapamount, targetChains)
 
 
 @mcp.tool()
-def perform_conditional_token_swap(tokenInaddress, tokenOutaddress, minPrice, swapamount, targetChain, slippage):
+async def get_price_impact_curve(tokenInaddress, tokenOutaddress, targetChain, amounts=None, minAmount=None, maxAmount=None, steps=10):
+    """Quotes a ladder of input sizes for one pair to show where price impact starts to bite.
+    Give either a list of amounts, or minAmount/maxAmount/steps for a geometric ladder.
+
+    Args:
+        tokenInaddress (str): Contract address of the input token (0x... format)
+        tokenOutaddress (str): Contract address of the output token (0x... format)
+        targetChain (str): Chain name where the swap will occur (e.g., "base")
+        amounts: Input amounts in human-readable units, as a list or comma-separated string
+            Example: "0.1,1,10,100"
+        minAmount: Smallest input amount of the ladder (used when amounts is not given)
+        maxAmount: Largest input amount of the ladder
+        steps (int): Number of sizes between minAmount and maxAmount (default: 10)
+
+    Returns:
+        dict:
+            - curve: Per size, smallest first: amountIn, outputAmount, effectiveRate
+              (output per input), marginalRate (extra output per extra input since the
+              previous size) and priceImpact (fraction of the smallest size's rate lost)
+            - errors: Sizes that could not be quoted
+        Example Error: {"error": "Give amounts or minAmount and maxAmount"}
+    """
+    try:
+        if amounts is not None:
+            if isinstance(amounts, str):
+                amounts = [amount.strip() for amount in amounts.split(',') if amount.strip()]
+        elif minAmount is not None and maxAmount is not None:
+            amounts = amount_ladder(minAmount, maxAmount, int(steps))
+        else:
+            return {"error": "Give amounts or minAmount and maxAmount"}
+        return await price_impact_curve(targetChain, tokenInaddress, tokenOutaddress, amounts)
+    except ValueError as error:
+        return {"error": str(error)}
+
+
+@mcp.tool()
+async def perform_conditional_token_swap(tokenInaddress, tokenOutaddress, minPrice, swapamount, targetChain, slippage):
     """This tool executes token swaps when the desired miniumum price is reached , 
     only used when there is a given price target/ minimum price to be swapped
     
@@ -86,30 +152,41 @@ def perform_conditional_token_swap(tokenInaddress, tokenOutaddress, minPrice, sw
     Returns:
         dict: Swap transaction details when successful, None if conditions not met
     """
-    POLL_INTERVAL = 2  
-    max_attempts = 100 
-
-    for attempt in range(max_attempts):
-        quote_data = get_swap_quote(tokenInaddress, tokenOutaddress, swapamount, targetChain)
-        if not quote_data:
-            return {"error": "Failed to get swap quote"}
-        current_price = int(quote_data['data']['routeSummary']['amountOut'])
-        print(f"[Attempt {attempt}] Current output: {current_price}, Target: {minPrice}")
-        if current_price >= minPrice:
-            swap_data = post_swap_quote(quote_data, slippage, targetChain)
-            if not swap_data:
-                return {"error": "Failed to build swap transaction"}
-            # tx_hash = execute_transaction(swap_data)
-            # if not tx_hash:
-            #     return {"error": "Transaction execution failed"}
-            # return tx_hash
-        time.sleep(POLL_INTERVAL)
-    return {"failed to swap at target price"}
+    # Give up after the same ~200 s the 100 x 2 s polling loop used to allow
+    WATCH_TIMEOUT = 200
+
+    try:
+        amount_in = int(Decimal(swapamount) * (10 ** await getDecimals(tokenInaddress, targetChain)))
+    except TokenLookupError as error:
+        return {"error": str(error)}
+
+    async def build_swap(quote_data):
+        swap_data = await post_swap_quote(quote_data, slippage, targetChain)
+        if not swap_data:
+            return {"error": "Failed to build swap transaction"}
+        # tx_hash = execute_transaction(swap_data)
+        # if not tx_hash:
+        #     return {"error": "Transaction execution failed"}
+        # return tx_hash
+        return swap_data
+
+    # The shared engine fetches one quote per (chain, pair, amount) per tick for all watchers
+    watch = price_watch.engine.register(
+        targetChain, tokenInaddress, tokenOutaddress, amount_in, int(minPrice), build_swap, timeout=WATCH_TIMEOUT
+    )
+    try:
+        result = await watch.future
+    except asyncio.CancelledError:
+        price_watch.engine.cancel(watch.id)
+        raise
+    if result is None:
+        return {"error": "failed to swap at target price"}
+    return result
 
 
  
 @mcp.tool()
-def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain, slippage):
+async def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain, slippage):
     """This tool executes a token swap without price targets or minimum price.
 
     Args:
@@ -124,12 +201,12 @@ def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain,
         Swap transaction data tx hash
     """
     # Step 1: Get the swap quote
-    quote_data = get_swap_quote(tokenInaddress, tokenOutaddress, swapamount, targetChain)
+    quote_data = await get_swap_quote(tokenInaddress, tokenOutaddress, swapamount, targetChain)
     if not quote_data:
         return {"error": "Failed to get swap quote"}
     
     # Step 2: Build the swap transaction with slippage tolerance
-    swap_data = post_swap_quote(quote_data, slippage, targetChain)
+    swap_data = await post_swap_quote(quote_data, slippage, targetChain)
     if not swap_data:
         return {"error": "Failed to build swap transaction"}
     
@@ -141,7 +218,7 @@ def perform_token_swap(tokenInaddress, tokenOutaddress, swapamount, targetChain,
 
 
 @mcp.tool()
-def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, ChainID, expiry_time):
+async def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, ChainID, expiry_time):
     """Creates a limit order.
     
     Args:
@@ -158,15 +235,18 @@ def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, Chai
 
     AmountIn = Decimal(AmountIn)
     AmountOut = Decimal(AmountOut)
-    makingAmount = str(int(AmountIn * (10 ** getDecimals(tokenInaddress))))
-    takingAmount = str(int(AmountOut * (10 ** getDecimals(tokenOutaddress))))
+    try:
+        makingAmount = str(int(AmountIn * (10 ** await getDecimals(tokenInaddress, ChainID))))
+        takingAmount = str(int(AmountOut * (10 ** await getDecimals(tokenOutaddress, ChainID))))
+    except TokenLookupError as error:
+        return {"error": str(error)}
 
     try:
         # First request to get signature data
-        response = requests.post(
-            'https://limit-order.kyberswap.com/write/api/v1/orders/sign-message',
+        response = await http_client.post(
+            f"{LIMIT_ORDER_DOMAIN}/write/api/v1/orders/sign-message",
             headers={'Content-Type': 'application/json'},
-            data=json.dumps({
+            content=json.dumps({
                 "chainId": ChainID,
                 "makerAsset": tokenInaddress,
                 "takerAsset": tokenOutaddress,
@@ -183,12 +263,12 @@ def place_limit_order(tokenInaddress, tokenOutaddress, AmountIn, AmountOut, Chai
         #     return {"error": "Transaction execution failed"}
         # return tx_hash
         
-    except requests.exceptions.RequestException as error:
-            return error.response.text if error.response else str(error) 
+    except httpx.HTTPError as error:
+            return http_client.error_text(error)
     
 
 @mcp.tool()
-def get_limit_orders(chainId):
+async def get_limit_orders(chainId):
     """Fetches active limit orders for a specific maker address.
     
     Args:
@@ -206,19 +286,20 @@ def get_limit_orders(chainId):
     """
     makeraddress = getSignerAddress()
     try:
-        response = requests.get(
-            f"https://limit-order.kyberswap.com/read-ks/api/v1/orders?chainId={chainId}&maker={makeraddress}&status=active",
+        response = await http_client.get(
+            f"{LIMIT_ORDER_DOMAIN}/read-ks/api/v1/orders",
+            params={"chainId": chainId, "maker": makeraddress, "status": "active"},
             headers={"Accept":"*/*"},
         )
 
         data = response.json()
         return data
-    except requests.exceptions.RequestException as error:
-        return error.response.text if error.response else str(error) 
+    except httpx.HTTPError as error:
+        return http_client.error_text(error)
 
 
 @mcp.tool()
-def cancel_limit_order(chainId, orderIds):
+async def cancel_limit_order(chainId, orderIds):
     """Cancels one or more limit orders on KyberSwap.
     
     Args:
@@ -229,10 +310,10 @@ def cancel_limit_order(chainId, orderIds):
         Dict: Response from KyberSwap API containing cancellation status.
         
     """
-    response = requests.post(
-        "https://limit-order.kyberswap.com/write/api/v1/orders/cancel-sign",
+    response = await http_client.post(
+        f"{LIMIT_ORDER_DOMAIN}/write/api/v1/orders/cancel-sign",
         headers={"Content-Type":"application/json"},
-        data=json.dumps({
+        content=json.dumps({
             "chainId":chainId,
             "maker":getSignerAddress(),
             "orderIds":orderIds})
@@ -241,10 +322,10 @@ def cancel_limit_order(chainId, orderIds):
 
     # logic for signing transaction
 
-    confirm_response = requests.post(
-    "https://limit-order.kyberswap.com/write/api/v1/orders/cancel",
+    confirm_response = await http_client.post(
+    f"{LIMIT_ORDER_DOMAIN}/write/api/v1/orders/cancel",
     headers={"Origin":"text","Content-Type":"application/json"},
-    data=json.dumps({"chainId":"137",
+    content=json.dumps({"chainId":"137",
                      "maker":"0x2bfc3A4Ef52Fe6cD2c5236dA08005C59EaFB43a7",
                      "orderIds":[22405],
                      "signature":"signed-data"})
@@ -253,6 +334,27 @@ def cancel_limit_order(chainId, orderIds):
     confirm_data = confirm_response.json()
     return confirm_data
 
+
+@mcp.tool()
+async def get_server_metrics():
+    """Returns this server's own performance metrics: per-tool call counts, errors and
+    latency, per-upstream-endpoint request counts and latency, cache hit ratios and
+    the number of conditional swap watches in flight.
+
+    Returns:
+        dict: {"tools": {...}, "upstream": {...}, "caches": {...}, "gauges": {...}};
+              latencies are in milliseconds (p50/p99 estimated from histograms)
+    """
+    return metrics.snapshot()
+
+
+@mcp.resource("metrics://snapshot")
+def metrics_snapshot() -> str:
+    """Performance metrics of this server as JSON (same content as get_server_metrics)."""
+    return json.dumps(metrics.snapshot())
+
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
+    # stdio by default; --transport sse serves many clients from one process
+    transport.run(mcp)
     
\ No newline at end of file
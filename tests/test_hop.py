@@ -0,0 +1,101 @@
+"""AsyncSuiRpcClient batching against a stub fullnode."""
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+
+import http_client
+import resilience
+from Hop import AsyncSuiRpcClient
+
+ENDPOINT = "https://fullnode.test:443"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_latencies", {})
+    monkeypatch.setattr(http_client, "_state", None)
+
+
+class Fullnode:
+    """Answers each batch shuffled; ``fail`` coin types get a JSON-RPC error, ``drop`` ones no response."""
+
+    def __init__(self, fail=(), drop=()):
+        self.fail = set(fail)
+        self.drop = set(drop)
+        self.batches = []
+
+    def __call__(self, request):
+        payloads = json.loads(request.content)
+        self.batches.append(payloads)
+        responses = []
+        for payload in payloads:
+            coin_type = payload["params"][0]
+            if coin_type in self.drop:
+                continue
+            if coin_type in self.fail:
+                responses.append({"jsonrpc": "2.0", "id": payload["id"],
+                                  "error": {"code": -32602, "message": f"bad coin type {coin_type}"}})
+            else:
+                responses.append({"jsonrpc": "2.0", "id": payload["id"], "result": {"symbol": coin_type.upper()}})
+        random.Random(len(self.batches)).shuffle(responses)
+        return httpx.Response(200, json=responses)
+
+
+def batch_call(fullnode, coin_types, max_batch_size=50):
+    async def main():
+        state = http_client._current_state()
+        await state.client.aclose()
+        state.client = httpx.AsyncClient(transport=httpx.MockTransport(fullnode))
+        client = AsyncSuiRpcClient(custom_endpoint=ENDPOINT, max_batch_size=max_batch_size)
+        try:
+            return await client.batch_call([("suix_getCoinMetadata", [coin_type]) for coin_type in coin_types])
+        finally:
+            await http_client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_shuffled_responses_come_back_in_call_order_with_errors_in_place():
+    coin_types = [f"0x{i}::coin::C{i}" for i in range(6)]
+    fullnode = Fullnode(fail=[coin_types[2]])
+
+    responses = batch_call(fullnode, coin_types)
+
+    assert len(fullnode.batches) == 1
+    assert [response["id"] for response in responses] == [payload["id"] for payload in fullnode.batches[0]]
+    assert responses[2]["error"]["message"] == f"bad coin type {coin_types[2]}"
+    assert "result" not in responses[2]
+    assert [response["result"]["symbol"] for i, response in enumerate(responses) if i != 2] == \
+        [coin_type.upper() for i, coin_type in enumerate(coin_types) if i != 2]
+
+
+def test_large_batches_are_split_and_reassembled_in_order():
+    coin_types = [f"0x{i}::coin::C{i}" for i in range(5)]
+    fullnode = Fullnode(fail=[coin_types[3]])
+
+    responses = batch_call(fullnode, coin_types, max_batch_size=2)
+
+    assert [len(batch) for batch in fullnode.batches] == [2, 2, 1]
+    assert "error" in responses[3]
+    assert [response.get("result", {}).get("symbol") for response in responses] == \
+        [coin_type.upper() if i != 3 else None for i, coin_type in enumerate(coin_types)]
+
+
+def test_missing_response_fails_the_batch():
+    coin_types = ["0x2::sui::SUI", "0x3::coin::GONE"]
+
+    with pytest.raises(Exception, match="no response for suix_getCoinMetadata"):
+        batch_call(Fullnode(drop=[coin_types[1]]), coin_types)
+
+
+def test_batch_level_error_fails_the_batch():
+    def fullnode(request):
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": None,
+                                         "error": {"code": -32600, "message": "batch too large"}})
+
+    with pytest.raises(Exception, match="batch too large"):
+        batch_call(fullnode, ["0x2::sui::SUI"])
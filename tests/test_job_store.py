@@ -0,0 +1,115 @@
+"""JobStore leases and the outcome write of a finished swap job."""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+import price_watch
+import swap_jobs
+from job_store import JobStore
+
+
+@pytest.fixture
+def store():
+    return JobStore(":memory:")
+
+
+def new_job(store, owner=None, lease=0.0):
+    return store.create('base', '0xin', '0xout', 10 ** 30, 5 * 10 ** 24, 50, expires_in=600, owner=owner, lease=lease)
+
+
+def test_expired_lease_can_be_claimed(store):
+    job = new_job(store, owner='a', lease=30)
+    store.update(job['id'], lease_until=time.time() - 1)
+
+    assert store.claim(job['id'], 'b', 30)
+    claimed = store.get(job['id'])
+    assert claimed['owner'] == 'b'
+    assert claimed['lease_until'] > time.time()
+
+
+def test_live_lease_cannot_be_claimed(store):
+    job = new_job(store, owner='a', lease=30)
+
+    assert not store.claim(job['id'], 'b', 30)
+    assert store.get(job['id'])['owner'] == 'a'
+    # The holder may claim its own job again
+    assert store.claim(job['id'], 'a', 30)
+
+
+def test_unowned_job_can_be_claimed(store):
+    job = new_job(store)
+
+    assert store.claim(job['id'], 'b', 30)
+    assert store.get(job['id'])['owner'] == 'b'
+
+
+def test_update_as_non_owner_is_a_no_op(store):
+    job = new_job(store, owner='a', lease=30)
+
+    assert not store.update(job['id'], only_if_active=True, owner='b', status='completed')
+    assert store.get(job['id'])['status'] == 'watching'
+    assert store.update(job['id'], only_if_active=True, owner='a', status='completed', result={'tx': '0x1'})
+    assert store.get(job['id'])['result'] == {'tx': '0x1'}
+
+
+def test_renew_extends_only_the_owners_watching_jobs(store):
+    mine = new_job(store, owner='a', lease=1)
+    cancelled = new_job(store, owner='a', lease=1)
+    theirs = new_job(store, owner='b', lease=1)
+    store.update(cancelled['id'], only_if_active=True, status='cancelled')
+
+    assert store.renew('a', 60) == [mine['id']]
+    assert store.get(mine['id'])['lease_until'] > time.time() + 30
+    assert store.get(cancelled['id'])['lease_until'] < time.time() + 30
+    assert store.get(theirs['id'])['lease_until'] < time.time() + 30
+
+
+def test_cancelled_job_cannot_be_claimed_or_finished(store):
+    job = new_job(store, owner='a', lease=30)
+    store.update(job['id'], lease_until=time.time() - 1)
+
+    # A cancel from any process wins over the owner's outcome and over a takeover
+    assert store.update(job['id'], only_if_active=True, status='cancelled')
+    assert not store.claim(job['id'], 'b', 30)
+    assert not store.update(job['id'], only_if_active=True, owner='a', status='completed')
+    assert store.get(job['id'])['status'] == 'cancelled'
+
+
+class LockedOnce(JobStore):
+    """Store whose first write fails like it does while another process holds the database lock."""
+
+    def __init__(self):
+        super().__init__(":memory:")
+        self.locked = True
+
+    def update(self, *args, **kwargs):
+        if self.locked:
+            self.locked = False
+            raise sqlite3.OperationalError("database is locked")
+        return super().update(*args, **kwargs)
+
+
+def test_outcome_is_recorded_after_the_database_was_locked(monkeypatch):
+    store = LockedOnce()
+    job = new_job(store, owner=swap_jobs.OWNER, lease=30)
+    monkeypatch.setattr(swap_jobs, "store", store)
+    monkeypatch.setattr(swap_jobs, "_watched", {job['id']})
+
+    async def run():
+        future = asyncio.get_running_loop().create_future()
+        future.set_result({'data': '0xswap'})
+        watch = price_watch.Watch(job['id'], 'base', '0xin', '0xout', job['amount_in'], job['min_price'],
+                                  on_trigger=None, deadline=time.monotonic() + 600, future=future, checks=3)
+        swap_jobs._on_done(job['id'], watch, future)
+        # Still held while the write is retried, so the lease keeps being renewed
+        assert job['id'] in swap_jobs._watched
+        await asyncio.gather(*swap_jobs._finishing)
+
+    asyncio.run(run())
+    finished = store.get(job['id'])
+    assert finished['status'] == 'completed'
+    assert finished['result'] == {'data': '0xswap'}
+    assert finished['checks'] == 3
+    assert job['id'] not in swap_jobs._watched
@@ -0,0 +1,93 @@
+"""PriceCache range bookkeeping against a stubbed download_ohlcv."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from price_cache import OHLCV_COLUMNS, PriceCache, merge_ranges, missing_ranges
+
+
+class StubDownload:
+    """Stands in for price_download.download_ohlcv: one bar per day, recording every call."""
+
+    def __init__(self, failed=()):
+        self.calls = []
+        self.failed = list(failed)
+
+    def __call__(self, ticker, start, end, interval):
+        self.calls.append((start, end))
+        days = pd.date_range(start, end, freq='D', inclusive='left')
+        frame = pd.DataFrame({'Date': days, **{column: 1.0 for column in OHLCV_COLUMNS}})
+        failed = [(lo, hi) for lo, hi in self.failed if lo < end and hi > start]
+        for lo, hi in failed:
+            frame = frame[(frame['Date'] < lo) | (frame['Date'] >= hi)]
+        frame = frame.reset_index(drop=True)
+        frame.attrs['failed_windows'] = failed
+        return frame
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PriceCache(str(tmp_path))
+
+
+def day(n):
+    return datetime(2024, 1, 1) + timedelta(days=n)
+
+
+def test_missing_ranges_and_merge_ranges():
+    covered = [(day(2), day(4)), (day(6), day(8))]
+
+    assert missing_ranges(covered, day(0), day(10)) == [(day(0), day(2)), (day(4), day(6)), (day(8), day(10))]
+    assert missing_ranges(covered, day(3), day(7)) == [(day(4), day(6))]
+    assert missing_ranges(covered, day(6), day(8)) == []
+    assert merge_ranges([(day(4), day(6)), (day(0), day(2)), (day(2), day(3)), (day(5), day(9))]) == \
+        [(day(0), day(3)), (day(4), day(9))]
+
+
+def test_overlapping_request_fetches_only_the_gap(cache):
+    download = StubDownload()
+
+    first = cache.get('ETH-USD', '1d', day(0), day(10), download)
+    second = cache.get('ETH-USD', '1d', day(5), day(15), download)
+
+    assert download.calls == [(day(0), day(10)), (day(10), day(15))]
+    assert list(first['Date']) == list(pd.date_range(day(0), day(10), freq='D', inclusive='left'))
+    assert list(second['Date']) == list(pd.date_range(day(5), day(15), freq='D', inclusive='left'))
+    assert second.attrs['missing_ranges'] == []
+
+    cache.get('ETH-USD', '1d', day(2), day(12), download)
+    assert len(download.calls) == 2
+
+
+def test_failed_windows_stay_uncovered_and_are_refetched(cache):
+    download = StubDownload(failed=[(day(3), day(5))])
+
+    first = cache.get('ETH-USD', '1d', day(0), day(10), download)
+
+    assert first.attrs['missing_ranges'] == [(day(3), day(5))]
+    assert day(3) not in set(first['Date'])
+
+    download.failed = []
+    second = cache.get('ETH-USD', '1d', day(0), day(10), download)
+
+    assert download.calls[1:] == [(day(3), day(5))]
+    assert second.attrs['missing_ranges'] == []
+    assert len(second) == 10
+
+
+def test_unsettled_bars_are_not_marked_covered(cache):
+    download = StubDownload()
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    start, end = today - timedelta(days=5), today + timedelta(days=1)
+
+    cache.get('ETH-USD', '1d', start, end, download)
+    _, covered = cache.load('ETH-USD', '1d')
+    cache.get('ETH-USD', '1d', start, end, download)
+
+    # Only what was older than one interval at the time is covered, so today is fetched again
+    assert covered[0][0] == start
+    assert datetime.now() - timedelta(days=1, minutes=1) < covered[0][1] <= datetime.now() - timedelta(days=1)
+    assert len(download.calls) == 2
+    assert download.calls[1][0] == covered[0][1]
+    assert download.calls[1][1] == end
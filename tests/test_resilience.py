@@ -0,0 +1,159 @@
+"""Circuit breaker, retries and hedging of http_client.request against httpx.MockTransport."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import http_client
+import resilience
+
+HOST = "upstream.test"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_latencies", {})
+    monkeypatch.setattr(resilience, "RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(http_client, "_state", None)
+
+
+def run(handler, scenario):
+    """Runs ``scenario()`` with the shared client answering through ``handler``."""
+    async def main():
+        state = http_client._current_state()
+        await state.client.aclose()
+        state.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await scenario()
+        finally:
+            await http_client.aclose()
+
+    return asyncio.run(main())
+
+
+class Handler:
+    """Answers with the given statuses in turn (repeating the last), counting requests."""
+
+    def __init__(self, *statuses, delays=()):
+        self.statuses = list(statuses)
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self, request):
+        index = self.calls
+        self.calls += 1
+        if index < len(self.delays):
+            await asyncio.sleep(self.delays[index])
+        status = self.statuses[min(index, len(self.statuses) - 1)]
+        if isinstance(status, Exception):
+            raise status
+        return httpx.Response(status, json={"attempt": index + 1})
+
+
+def test_breaker_opens_after_consecutive_failures_and_posts_fail_fast():
+    handler = Handler(503)
+
+    async def scenario():
+        for _ in range(resilience.BREAKER_FAILURES):
+            response = await http_client.post(f"https://{HOST}/build", json={})
+            assert response.status_code == 503
+        with pytest.raises(resilience.CircuitOpenError):
+            await http_client.post(f"https://{HOST}/build", json={})
+
+    run(handler, scenario)
+    # Non-idempotent POSTs are never retried, and the open circuit sent nothing
+    assert handler.calls == resilience.BREAKER_FAILURES
+    assert resilience.breaker(HOST).state == "open"
+
+
+def test_half_open_probe_closes_the_circuit_on_success():
+    handler = Handler(500, 500, 200)
+
+    async def scenario():
+        breaker = resilience.breaker(HOST)
+        breaker.failure_threshold = 2
+        breaker.reset_timeout = 0.05
+        for _ in range(2):
+            await http_client.post(f"https://{HOST}/build")
+        assert breaker.state == "open"
+        await asyncio.sleep(0.06)
+        assert breaker.state == "half-open"
+        response = await http_client.post(f"https://{HOST}/build")
+        return breaker, response
+
+    breaker, response = run(handler, scenario)
+    assert response.status_code == 200
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_only_one_probe_is_let_through_while_half_open():
+    breaker = resilience.CircuitBreaker(HOST, failure_threshold=1, reset_timeout=0)
+    breaker.record(ok=False)
+
+    breaker.before()
+    with pytest.raises(resilience.CircuitOpenError):
+        breaker.before()
+    breaker.record(ok=False)
+    assert breaker.state == "half-open"
+    # A probe cancelled before its outcome frees the slot again
+    breaker.before()
+    breaker.abandon()
+    breaker.before()
+
+
+def test_gets_are_retried_on_retryable_statuses_and_transport_errors():
+    handler = Handler(httpx.ConnectError("refused"), 503, 200)
+
+    response = run(handler, lambda: http_client.get(f"https://{HOST}/routes"))
+
+    assert response.status_code == 200
+    assert handler.calls == 3
+
+
+def test_gets_give_up_after_the_last_retry():
+    handler = Handler(502)
+
+    response = run(handler, lambda: http_client.get(f"https://{HOST}/routes"))
+
+    assert response.status_code == 502
+    assert handler.calls == resilience.RETRIES + 1
+
+
+def test_client_errors_are_not_retried():
+    handler = Handler(400)
+
+    response = run(handler, lambda: http_client.get(f"https://{HOST}/routes"))
+
+    assert response.status_code == 400
+    assert handler.calls == 1
+    assert resilience.breaker(HOST).failures == 0
+
+
+def test_slow_get_is_hedged_past_the_p95():
+    tracker = resilience.latency(HOST, "/routes")
+    for _ in range(tracker.min_samples):
+        tracker.observe(0.01)
+    # The first request hangs well past the p95; the duplicate answers at once
+    handler = Handler(200, delays=[2.0, 0.0])
+
+    async def scenario():
+        started = time.monotonic()
+        response = await http_client.get(f"https://{HOST}/routes")
+        return response, time.monotonic() - started
+
+    response, elapsed = run(handler, scenario)
+    assert response.json() == {"attempt": 2}
+    assert handler.calls == 2
+    assert elapsed < 1.0
+
+
+def test_no_hedging_until_enough_latencies_are_known():
+    handler = Handler(200, delays=[0.2])
+
+    response = run(handler, lambda: http_client.get(f"https://{HOST}/routes"))
+
+    assert response.json() == {"attempt": 1}
+    assert handler.calls == 1
@@ -0,0 +1,106 @@
+"""ToolResultCache only reuses results that did not fail."""
+import asyncio
+import json
+
+import pytest
+
+from tool_cache import ToolResultCache, failed_result
+
+# An ended range, so a good historical result would be kept until evicted
+ENDED = {"ticker": "ETH-USD", "start_date": "2024-01-01", "end_date": "2024-02-01"}
+QUOTE = {"tokenInaddress": "0xa", "tokenOutaddress": "0xb", "swapamount": "1", "targetChain": "base"}
+
+
+def mcp_result(value):
+    # What a LangChain MCP tool coroutine returns: (text content, artifacts);
+    # FastMCP sends a None result as no content
+    return ([] if value is None else json.dumps(value)), None
+
+
+def calls_made(name, arguments, value, times=2):
+    cache = ToolResultCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return mcp_result(value)
+
+    async def run():
+        for _ in range(times):
+            assert await cache.call(name, arguments, fetch) == mcp_result(value)
+
+    asyncio.run(run())
+    return len(calls)
+
+
+@pytest.mark.parametrize("name, arguments, value", [
+    ("get_price_data", ENDED, {"rows": [{"Date": "2024-01-01", "Close": 1.0}], "missingRanges": []}),
+    ("get_batch_price_data", ENDED, {"rows": [], "missingRanges": {}}),
+    ("get_current_swap_rate", QUOTE, {"outputAmount": 1.5, "quoteAgeSeconds": 0.1}),
+    ("get_sui_coin_metadata", {"coinTypes": "0x2::sui::SUI"}, {"coins": {"0x2::sui::SUI": {}}, "errors": {}}),
+    ("get_price_impact_curve", QUOTE, {"curve": [{"amountIn": 1.0}], "errors": []}),
+])
+def test_good_results_are_reused(name, arguments, value):
+    assert calls_made(name, arguments, value) == 1
+
+
+@pytest.mark.parametrize("name, arguments, value", [
+    # get_current_swap_rate returns None after an HTTP error
+    ("get_current_swap_rate", QUOTE, None),
+    ("get_current_swap_rate", QUOTE, {"error": "No RPC endpoint configured for chain linea"}),
+    ("get_best_swap_rate", QUOTE, {"best": None, "quotes": [], "errors": [{"chain": "base", "error": "timeout"}]}),
+    ("get_price_data", ENDED, {"rows": [], "missingRanges": [["2024-01-05", "2024-01-08"]]}),
+    ("get_batch_price_data", ENDED, {"rows": [], "missingRanges": {"BTC-USD": [["2024-01-05", "2024-01-08"]]}}),
+    ("get_sui_coin_metadata", {"coinTypes": "0x2::sui::SUI"}, {"coins": {}, "errors": {"0x2::sui::SUI": "not found"}}),
+])
+def test_failed_results_are_not_reused(name, arguments, value):
+    assert failed_result(mcp_result(value))
+    assert calls_made(name, arguments, value) == 2
+
+
+def test_raised_errors_are_not_reused():
+    cache = ToolResultCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        raise RuntimeError("upstream down")
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.call("get_price_data", ENDED, fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert len(cache) == 0
+
+
+def test_plain_text_results_count_as_good():
+    assert not failed_result(("ETH-USD moved 3%", None))
+    assert not failed_result(("[1, 2]", None))
+
+
+def test_metadata_is_only_kept_for_good_once_every_coin_resolved():
+    cache = ToolResultCache()
+    arguments = {"coinTypes": "0x2::sui::SUI,0xdead::coin::COIN"}
+    results = [
+        {"coins": {"0x2::sui::SUI": {"decimals": 9}}, "errors": {"0xdead::coin::COIN": "not found"}},
+        {"coins": {"0x2::sui::SUI": {"decimals": 9}, "0xdead::coin::COIN": {"decimals": 6}}, "errors": {}},
+    ]
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return mcp_result(results[min(len(calls), len(results)) - 1])
+
+    async def run():
+        first = await cache.call("get_sui_coin_metadata", arguments, fetch)
+        second = await cache.call("get_sui_coin_metadata", arguments, fetch)
+        third = await cache.call("get_sui_coin_metadata", arguments, fetch)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == mcp_result(results[0])
+    assert second == third == mcp_result(results[1])
+    assert len(calls) == 2
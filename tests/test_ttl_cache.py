@@ -0,0 +1,123 @@
+"""TTLCache freshness, eviction and single-flight coalescing."""
+import asyncio
+import time
+
+import pytest
+
+from ttl_cache import TTLCache
+
+
+class Upstream:
+    """Counts fetches; each one takes ``delay`` seconds and returns the next value or raises ``error``."""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return f"value-{self.calls}"
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = TTLCache(ttl=60)
+    upstream = Upstream()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_fetch("key", upstream.fetch) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert upstream.calls == 1
+    assert {value for value, _ in results} == {"value-1"}
+
+
+def test_failed_fetch_is_raised_to_every_waiter_and_not_cached():
+    cache = TTLCache(ttl=60)
+    upstream = Upstream(error=RuntimeError("upstream down"))
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_fetch("key", upstream.fetch) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert upstream.calls == 1
+        assert len(cache) == 0
+
+        upstream.error = None
+        return await cache.get_or_fetch("key", upstream.fetch)
+
+    assert asyncio.run(run())[0] == "value-2"
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_fetch():
+    cache = TTLCache(ttl=60)
+    upstream = Upstream(delay=0.1)
+
+    async def run():
+        impatient = asyncio.ensure_future(cache.get_or_fetch("key", upstream.fetch))
+        patient = asyncio.ensure_future(cache.get_or_fetch("key", upstream.fetch))
+        await asyncio.sleep(0.02)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run())[0] == "value-1"
+    assert upstream.calls == 1
+    assert cache.get("key")[0] == "value-1"
+
+
+def test_entries_expire_after_the_ttl():
+    cache = TTLCache(ttl=0.05)
+    upstream = Upstream(delay=0)
+
+    async def run():
+        first = await cache.get_or_fetch("key", upstream.fetch)
+        again = await cache.get_or_fetch("key", upstream.fetch)
+        await asyncio.sleep(0.06)
+        later = await cache.get_or_fetch("key", upstream.fetch)
+        return first, again, later
+
+    first, again, later = asyncio.run(run())
+    assert first[0] == again[0] == "value-1"
+    assert again[1] >= first[1]
+    assert later[0] == "value-2"
+    assert upstream.calls == 2
+
+
+def test_max_age_refetches_a_value_still_within_the_ttl():
+    cache = TTLCache(ttl=60)
+    upstream = Upstream(delay=0)
+
+    async def run():
+        await cache.get_or_fetch("key", upstream.fetch)
+        await asyncio.sleep(0.02)
+        within = await cache.get_or_fetch("key", upstream.fetch, max_age=1)
+        refetched = await cache.get_or_fetch("key", upstream.fetch, max_age=0.01)
+        return within, refetched
+
+    within, refetched = asyncio.run(run())
+    assert within[0] == "value-1"
+    assert refetched == ("value-2", pytest.approx(0, abs=0.01))
+
+
+def test_least_recently_stored_entries_are_evicted():
+    cache = TTLCache(ttl=None, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+
+    assert cache.get("a") is None
+    assert cache.get("b")[0] == "B"
+    assert cache.get("c")[0] == "C"
+
+
+def test_evict_expired_drops_only_stale_entries():
+    cache = TTLCache(ttl=0.05)
+    cache.set("old", 1)
+    time.sleep(0.06)
+    cache.set("new", 2)
+
+    cache.evict_expired()
+    assert len(cache) == 1
+    assert cache.get("new")[0] == 2
@@ -0,0 +1,196 @@
+"""Persistent (chain, token address) -> decimals/symbol registry.
+
+The registry is loaded from disk once and shared by every tool. Unknown
+tokens are resolved on-chain through web3 on first use and written back, so
+each token costs at most one RPC lookup for the lifetime of the file.
+"""
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Union
+
+import metrics
+from blocking import run_blocking
+
+if TYPE_CHECKING:
+    from web3 import Web3
+
+# Same as getdecimal.NATIVE_TOKEN_ADDRESS; getdecimal imports web3, which is
+# only needed once a token has to be looked up on-chain
+NATIVE_TOKEN_ADDRESS = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+REGISTRY_PATH = os.environ.get(
+    "TOKEN_REGISTRY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".token_registry.json")
+)
+
+# KyberSwap chain names and their EVM chain ids
+CHAIN_IDS = {
+    "ethereum": 1,
+    "optimism": 10,
+    "bsc": 56,
+    "polygon": 137,
+    "base": 8453,
+    "arbitrum": 42161,
+    "avalanche": 43114,
+}
+CHAIN_NAMES = {chain_id: name for name, chain_id in CHAIN_IDS.items()}
+
+# Public RPC endpoints, overridable with RPC_URL_<CHAIN> (e.g., RPC_URL_BASE)
+DEFAULT_RPC_URLS = {
+    "ethereum": "https://ethereum-rpc.publicnode.com",
+    "optimism": "https://mainnet.optimism.io",
+    "bsc": "https://bsc-dataseed.binance.org",
+    "polygon": "https://polygon-rpc.com",
+    "base": "https://mainnet.base.org",
+    "arbitrum": "https://arb1.arbitrum.io/rpc",
+    "avalanche": "https://api.avax.network/ext/bc/C/rpc",
+}
+
+NATIVE_SYMBOLS = {
+    "ethereum": "ETH",
+    "optimism": "ETH",
+    "bsc": "BNB",
+    "polygon": "POL",
+    "base": "ETH",
+    "arbitrum": "ETH",
+    "avalanche": "AVAX",
+}
+
+
+class TokenLookupError(ValueError):
+    """A token's decimals could not be found in the registry or read on-chain."""
+
+
+def normalize_chain(chain: Union[str, int]) -> str:
+    """Maps a chain name or chain id (e.g., "Base", 8453, "8453") to its lowercase chain name.
+
+    Chain ids without a known name are kept as the id (e.g., "59144"), so
+    they work once ``RPC_URL_<ID>`` is set.
+    """
+    if isinstance(chain, int) or str(chain).isdigit():
+        chain_id = int(chain)
+        return CHAIN_NAMES.get(chain_id, str(chain_id))
+    return str(chain).lower()
+
+
+def rpc_url(chain: str) -> str:
+    url = os.environ.get(f"RPC_URL_{chain.upper()}", DEFAULT_RPC_URLS.get(chain))
+    if url is None:
+        raise TokenLookupError(f"No RPC endpoint configured for chain {chain}; set RPC_URL_{chain.upper()}")
+    return url
+
+
+class TokenRegistry:
+    def __init__(self, path: str = REGISTRY_PATH):
+        """
+        Args:
+            path: JSON file the registry is loaded from and persisted to
+        """
+        self.path = path
+        self._tokens: Dict[str, Dict] = {}
+        self._web3: Dict[str, "Web3"] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(chain: str, address: str) -> str:
+        return f"{chain}:{address.lower()}"
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self._tokens = json.load(f)
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._tokens, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def web3(self, chain: str) -> "Web3":
+        """Returns the (cached) Web3 connection for a chain."""
+        from web3 import Web3
+
+        with self._lock:
+            if chain not in self._web3:
+                self._web3[chain] = Web3(Web3.HTTPProvider(rpc_url(chain), request_kwargs={"timeout": 10}))
+            return self._web3[chain]
+
+    def lookup(self, chain: Union[str, int], address: str) -> Optional[Dict]:
+        """Returns the registered metadata for a token without touching the network."""
+        chain = normalize_chain(chain)
+        if address.lower() == NATIVE_TOKEN_ADDRESS:
+            return {"decimals": 18, "symbol": NATIVE_SYMBOLS.get(chain)}
+        return self._tokens.get(self._key(chain, address))
+
+    def register(self, chain: Union[str, int], address: str, decimals: int, symbol: Optional[str] = None):
+        """Adds or replaces a token's metadata and persists the registry."""
+        self.register_many(chain, {address: {"decimals": decimals, "symbol": symbol}})
+
+    def register_many(self, chain: Union[str, int], tokens: Dict[str, Dict]):
+        """Adds or replaces several tokens' metadata with a single write to disk."""
+        chain = normalize_chain(chain)
+        with self._lock:
+            for address, token in tokens.items():
+                self._tokens[self._key(chain, address)] = {"decimals": int(token["decimals"]), "symbol": token.get("symbol")}
+            self._save()
+
+    def warm(self, chain: Union[str, int], addresses: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Fetches every unregistered token among ``addresses`` in one Multicall3 batch.
+
+        Returns:
+            dict: Lowercase address -> metadata, or None for tokens without a
+                  readable ``decimals()``
+        """
+        chain = normalize_chain(chain)
+        addresses = list(dict.fromkeys(address.lower() for address in addresses))
+        tokens = {address: self.lookup(chain, address) for address in addresses}
+        missing = [address for address, token in tokens.items() if token is None]
+        metrics.record_cache("tokens", "hit", len(tokens) - len(missing))
+        metrics.record_cache("tokens", "miss", len(missing))
+        if missing:
+            from getdecimal import getTokenMetadataBatch
+
+            fetched = getTokenMetadataBatch(missing, self.web3(chain), fields=("decimals", "symbol"))
+            found = {address: token for address, token in fetched.items() if token["decimals"] is not None}
+            if found:
+                self.register_many(chain, found)
+            for address in missing:
+                tokens[address] = self.lookup(chain, address)
+        return tokens
+
+    def resolve(self, chain: Union[str, int], address: str) -> Dict:
+        """Returns a token's metadata, fetching it on-chain on a registry miss.
+
+        Raises:
+            TokenLookupError: If the chain has no RPC endpoint, the RPC call fails,
+                or the token's decimals cannot be read on-chain
+        """
+        try:
+            token = self.warm(chain, [address])[address.lower()]
+        except TokenLookupError:
+            raise
+        except Exception as error:
+            # web3 surfaces connection problems as requests/web3 errors of many kinds
+            raise TokenLookupError(f"Could not read decimals of {address} on {normalize_chain(chain)}: {error}") from error
+        if token is None:
+            raise TokenLookupError(f"Contract {address} on {normalize_chain(chain)} doesn't support decimals function")
+        return token
+
+    def get_decimals(self, chain: Union[str, int], address: str) -> int:
+        return self.resolve(chain, address)["decimals"]
+
+    async def aresolve(self, chain: Union[str, int], address: str) -> Dict:
+        """Async ``resolve``; on-chain lookups run in the tool thread pool."""
+        token = self.lookup(chain, address)
+        if token is not None:
+            metrics.record_cache("tokens", "hit")
+            return token
+        return await run_blocking(self.resolve, chain, address)
+
+    async def aget_decimals(self, chain: Union[str, int], address: str) -> int:
+        return (await self.aresolve(chain, address))["decimals"]
+
+
+registry = TokenRegistry()
@@ -0,0 +1,187 @@
+"""Client-side memoization of MCP tool results for the langgraph agent.
+
+Agents ask for the same historical range again within one conversation and
+across conversations. ``cache_tools`` wraps the tools from ``load_mcp_tools``
+so repeat calls are answered in-process:
+
+- Historical price tools: cached forever once the range has ended, for
+  ``RECENT_PRICE_TTL`` seconds while it still includes today.
+- Sui coin metadata: cached forever once every requested coin resolved; it
+  cannot change once a coin is published.
+- Quote and balance tools: cached for ``QUOTE_TTL`` seconds.
+- Everything else (swaps, limit orders, job status, metrics): never cached.
+
+Entries are evicted least recently used first beyond ``TOOL_CACHE_MAX_ENTRIES``.
+Failed calls are never cached: calls that raised, and results the server tools
+report failures in (see ``failed_result``).
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+QUOTE_TTL = float(os.environ.get("TOOL_CACHE_QUOTE_TTL", 15))
+RECENT_PRICE_TTL = float(os.environ.get("TOOL_CACHE_RECENT_PRICE_TTL", 60))
+MAX_ENTRIES = int(os.environ.get("TOOL_CACHE_MAX_ENTRIES", 512))
+
+# Seconds a result stays fresh: None keeps it until evicted, 0 never stores it
+NEVER = 0.0
+
+HISTORICAL_TOOLS = frozenset({"get_price_data", "get_batch_price_data", "get_price_analytics"})
+IMMUTABLE_TOOLS = frozenset({"get_sui_coin_metadata"})
+QUOTE_TOOLS = frozenset({"get_current_swap_rate", "get_best_swap_rate", "get_price_impact_curve", "get_sui_balances"})
+
+
+def _range_has_ended(end_date: Any) -> bool:
+    # yfinance treats end_date as exclusive, so a range ending today only holds settled bars
+    try:
+        end = date.fromisoformat(str(end_date)[:10])
+    except ValueError:
+        return False
+    return end <= datetime.now(timezone.utc).date()
+
+
+def cache_ttl(name: str, arguments: Dict[str, Any]) -> Optional[float]:
+    """Returns how long a result of ``name`` called with ``arguments`` may be reused."""
+    if name in HISTORICAL_TOOLS:
+        return None if _range_has_ended(arguments.get("end_date")) else RECENT_PRICE_TTL
+    if name in IMMUTABLE_TOOLS:
+        return None
+    if name in QUOTE_TOOLS:
+        return QUOTE_TTL
+    return NEVER
+
+
+def failed_result(value: Any) -> bool:
+    """Tells whether a tool result reports a failure instead of raising it.
+
+    The server tools return None or ``{"error": ...}`` when an upstream call
+    fails, list per-item failures under ``"errors"``, and list price ranges
+    that could not be downloaded under ``"missingRanges"``.
+
+    Args:
+        value: What the tool coroutine returned; LangChain MCP tools return
+            (text content, artifacts) with the tool's result as JSON text
+    """
+    content = value[0] if isinstance(value, tuple) else value
+    # FastMCP sends a None result as no content at all
+    if content is None or content == []:
+        return True
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError:
+            return False
+    if content is None:
+        return True
+    if isinstance(content, dict):
+        return "error" in content or bool(content.get("errors")) or bool(content.get("missingRanges"))
+    return False
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES,
+                 ttl_for: Callable[[str, Dict[str, Any]], Optional[float]] = cache_ttl,
+                 failed: Callable[[Any], bool] = failed_result):
+        """
+        Args:
+            max_entries: Least recently used results are dropped beyond this size
+            ttl_for: Cacheability rule per tool call, see ``cache_ttl``
+            failed: Results it returns True for are handed back but not stored,
+                see ``failed_result``
+        """
+        self.max_entries = max_entries
+        self.ttl_for = ttl_for
+        self.failed = failed
+        self.hits = 0
+        self.misses = 0
+        # key -> (value, expires_at or None)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> Hashable:
+        return name, json.dumps(arguments, sort_keys=True, default=str)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any]]:
+        """Returns (value,) for a fresh entry, None otherwise."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return (value,)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float]):
+        self._entries.pop(key, None)
+        self._entries[key] = (value, None if ttl is None else time.monotonic() + ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def call(self, name: str, arguments: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns a reusable earlier result of the call, or makes it once for all concurrent callers."""
+        ttl = self.ttl_for(name, arguments)
+        if ttl == NEVER:
+            return await fetch()
+
+        key = self.key(name, arguments)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached[0]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Joining a call already in flight costs no extra round trip either
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._fill(key, fetch, ttl))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        try:
+            value = await fetch()
+            if not self.failed(value):
+                self.set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+cache = ToolResultCache()
+
+
+def cache_tools(tools: List[Any], result_cache: Optional[ToolResultCache] = None) -> List[Any]:
+    """Returns copies of LangChain MCP tools whose calls go through ``result_cache``.
+
+    Args:
+        tools: Tools from ``langchain_mcp_adapters.tools.load_mcp_tools``
+        result_cache: Cache to use (default: the process-wide ``cache``)
+    """
+    if result_cache is None:
+        result_cache = cache
+
+    def wrap(tool):
+        call = tool.coroutine
+
+        async def cached_call(**arguments):
+            return await result_cache.call(tool.name, arguments, lambda: call(**arguments))
+
+        return tool.model_copy(update={"coroutine": cached_call})
+
+    return [wrap(tool) for tool in tools]
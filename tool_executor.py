@@ -0,0 +1,65 @@
+"""Concurrent execution of the independent tool calls an agent makes in one turn.
+
+When the model asks for several tool calls at once (say quotes for three
+pairs), running them one after another makes the turn as slow as their sum.
+``ToolExecutor`` runs them side by side, at most ``fan_out`` at a time, and
+returns the results in the order the calls were made, so the turn takes
+about as long as its slowest call.
+
+- langgraph's ``ToolNode`` already gathers the calls of a turn;
+  ``ToolExecutor.limit`` caps how many of them reach the MCP sessions at once.
+- smolagents' ``ToolCallingAgent`` only runs the first call of a turn;
+  ``ToolExecutor.map`` runs all of them on threads (see agent.py).
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+FAN_OUT = int(os.environ.get("TOOL_FAN_OUT", 4))
+
+
+class ToolExecutor:
+    def __init__(self, fan_out: int = FAN_OUT):
+        """
+        Args:
+            fan_out: Most tool calls of one agent process running at the same time
+        """
+        self.fan_out = fan_out
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.fan_out)
+        return self._slots
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits one call once a fan-out slot is free."""
+        async with self._semaphore():
+            return await call()
+
+    def map(self, calls: Sequence[Callable[[], Any]]) -> List[Any]:
+        """Runs blocking calls on threads and returns their results in call order.
+
+        Every call runs to completion; the first failure in call order is raised afterwards.
+        """
+        if len(calls) <= 1:
+            return [call() for call in calls]
+        with ThreadPoolExecutor(max_workers=min(self.fan_out, len(calls)), thread_name_prefix="tool-call") as pool:
+            futures = [pool.submit(call) for call in calls]
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+
+    def limit(self, tools: List[Any]) -> List[Any]:
+        """Returns copies of LangChain tools whose calls wait for a fan-out slot."""
+        def wrap(tool):
+            call = tool.coroutine
+
+            async def limited_call(**arguments):
+                return await self.run(lambda: call(**arguments))
+
+            return tool.model_copy(update={"coroutine": limited_call})
+
+        return [wrap(tool) for tool in tools]
@@ -0,0 +1,91 @@
+"""Command line entry point shared by the MCP servers.
+
+``stdio`` (the default) serves the one client that spawned the process. The
+HTTP transports serve any number of concurrent clients from one long-running
+process, so every client shares the same quote and price caches, token
+registry, price watch engine and upstream connection pools.
+
+    uv run server.py --transport sse --port 8000
+    uv run server.py --transport streamable-http --max-connections 500
+
+Upstream concurrency keeps its own limits (HTTP_MAX_REQUESTS_PER_HOST,
+YF_MAX_WORKERS, PRICE_IMPACT_MAX_IN_FLIGHT).
+"""
+import argparse
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import List, Optional
+
+from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+import metrics
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+
+def supports_streamable_http(mcp: FastMCP) -> bool:
+    # Streamable HTTP arrived in mcp 1.8; older releases only speak SSE
+    return hasattr(mcp, "streamable_http_app")
+
+
+def http_app(mcp: FastMCP, transport: str = "sse") -> Starlette:
+    """Returns the ASGI app serving ``mcp`` over SSE or streamable HTTP.
+
+    The server's lifespan runs once for the whole process, on application
+    startup, rather than only around each client session. ``/metrics`` serves
+    the process metrics in the Prometheus text format.
+    """
+    app = mcp.streamable_http_app() if transport == "streamable-http" else mcp.sse_app()
+
+    async def prometheus_metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    app.router.routes.append(Route("/metrics", prometheus_metrics, methods=["GET"]))
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(starlette_app):
+        async with AsyncExitStack() as stack:
+            if mcp.settings.lifespan is not None:
+                await stack.enter_async_context(mcp.settings.lifespan(mcp))
+            await stack.enter_async_context(app_lifespan(starlette_app))
+            yield
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def run(mcp: FastMCP, argv: Optional[List[str]] = None):
+    """Parses the transport options and serves ``mcp`` until interrupted."""
+    parser = argparse.ArgumentParser(description=f"Run the {mcp.name} MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.environ.get("MCP_TRANSPORT", "stdio"),
+                        help="stdio for a single spawning client, sse or streamable-http for many (default: stdio)")
+    parser.add_argument("--host", default=os.environ.get("MCP_HOST", "127.0.0.1"),
+                        help="Interface to listen on in HTTP mode (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MCP_PORT", 8000)),
+                        help="Port to listen on in HTTP mode (default: 8000)")
+    parser.add_argument("--max-connections", type=int, default=int(os.environ.get("MCP_MAX_CONNECTIONS", 256)),
+                        help="Concurrent HTTP connections and requests before new ones get a 503 (default: 256)")
+    args = parser.parse_args(argv)
+
+    if args.transport == "stdio":
+        mcp.run(transport="stdio")
+        return
+    if args.transport == "streamable-http" and not supports_streamable_http(mcp):
+        parser.error("streamable-http needs mcp>=1.8; use --transport sse with this version")
+
+    import uvicorn
+
+    uvicorn.run(
+        http_app(mcp, args.transport),
+        host=args.host,
+        port=args.port,
+        limit_concurrency=args.max_connections,
+        # Open SSE streams never finish on their own; don't let them block shutdown
+        timeout_graceful_shutdown=5,
+        log_level=mcp.settings.log_level.lower()
+    )
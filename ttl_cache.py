@@ -0,0 +1,104 @@
+"""In-memory TTL cache with single-flight coalescing for async upstream calls."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import metrics
+
+
+class TTLCache:
+    def __init__(self, ttl: Optional[float], max_entries: int = 1024, name: Optional[str] = None):
+        """
+        Args:
+            ttl: Seconds an entry stays fresh; None keeps entries until they are evicted for space
+            max_entries: Least recently stored entries are dropped beyond this size
+            name: Label for hit/miss metrics of ``get_or_fetch``; unnamed caches are not recorded
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_fresh(self, stored_at: float, now: float) -> bool:
+        return self.ttl is None or now - stored_at < self.ttl
+
+    def evict_expired(self):
+        """Drops every entry older than the TTL."""
+        now = time.monotonic()
+        # Entries are kept in storage order, so the stale ones are at the front
+        while self._entries:
+            key, (_, stored_at) = next(iter(self._entries.items()))
+            if self._is_fresh(stored_at, now):
+                break
+            del self._entries[key]
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Returns (value, age in seconds) for a fresh entry, None otherwise."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        now = time.monotonic()
+        if not self._is_fresh(stored_at, now):
+            del self._entries[key]
+            return None
+        return value, now - stored_at
+
+    def set(self, key: Hashable, value: Any) -> Tuple[Any, float]:
+        """Stores a value and returns the (value, stored_at) entry."""
+        entry = (value, time.monotonic())
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                           max_age: Optional[float] = None) -> Tuple[Any, float]:
+        """Returns a fresh cached value, or fetches it once for all concurrent callers.
+
+        Concurrent calls for the same key while a fetch is running share that
+        fetch instead of starting their own. Failed fetches are not cached and
+        their exception is raised to every waiting caller.
+
+        Args:
+            key: Cache key
+            fetch: Coroutine function producing the value
+            max_age: Optionally refetch cached values older than this many seconds,
+                even if they are still within the TTL
+
+        Returns:
+            tuple: (value, age of the value in seconds)
+        """
+        self.evict_expired()
+        cached = self.get(key)
+        if cached is not None and (max_age is None or cached[1] <= max_age):
+            self._record("hit")
+            return cached
+
+        task = self._inflight.get(key)
+        self._record("coalesced" if task is not None else "miss")
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._fill(key, fetch))
+            # Nobody may be left waiting when the fetch fails; mark its error as seen
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+
+        # One caller giving up must not cancel the fetch for the others
+        value, stored_at = await asyncio.shield(task)
+        return value, time.monotonic() - stored_at
+
+    def _record(self, result: str):
+        if self.name is not None:
+            metrics.record_cache(self.name, result)
+
+    async def _fill(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        try:
+            return self.set(key, await fetch())
+        finally:
+            self._inflight.pop(key, None)